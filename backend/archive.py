@@ -0,0 +1,203 @@
+# archive.py
+# Cold storage for closed applications and their cover letter bodies.
+#
+# Applications that ended (rejected/accepted) and have not been touched for
+# ARCHIVE_AFTER_MONTHS are moved out of the hot `applications` table into
+# `archived_applications` as zlib-compressed JSON. Cover letters only used by
+# archived applications keep their row (resumes and exports still point at it),
+# but their content and job description move to `archived_cover_letter_bodies`.
+# Readers go through the helpers below, which decompress on demand.
+#
+#   python archive.py [--months 6] [--batch-size 500] [--dry-run]
+import argparse
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import func, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from models import Application, ArchivedApplication, ArchivedCoverLetterBody, CoverLetter
+
+CLOSED_STATUSES = ("rejected", "accepted")
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "6"))
+# content/job_description are NOT NULL; archived rows keep an empty string
+ARCHIVED_PLACEHOLDER = ""
+
+
+def _pack(data: dict) -> bytes:
+    return zlib.compress(json.dumps(data, default=str).encode("utf-8"), 9)
+
+
+def _unpack(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def ensure_archive_schema(engine: Engine):
+    """Add cover_letters.archived_at to databases created before it existed."""
+    columns = {c["name"] for c in inspect(engine).get_columns("cover_letters")}
+    if "archived_at" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE cover_letters ADD COLUMN archived_at TIMESTAMP WITH TIME ZONE"
+                              if engine.dialect.name == "postgresql"
+                              else "ALTER TABLE cover_letters ADD COLUMN archived_at DATETIME"))
+
+
+def _row_dict(obj) -> dict:
+    return {c.key: getattr(obj, c.key) for c in inspect(obj).mapper.column_attrs}
+
+
+def archive_cover_letter(db: Session, cover_letter: CoverLetter, now: datetime = None):
+    db.add(ArchivedCoverLetterBody(
+        cover_letter_id=cover_letter.id,
+        archived_at=now or datetime.utcnow(),
+        payload=_pack({
+            "job_description": cover_letter.job_description,
+            "content": cover_letter.content,
+        }),
+    ))
+    cover_letter.job_description = ARCHIVED_PLACEHOLDER
+    cover_letter.content = ARCHIVED_PLACEHOLDER
+    cover_letter.archived_at = now or datetime.utcnow()
+
+
+def restore_cover_letter(db: Session, cover_letter: CoverLetter):
+    """Move an archived body back into the hot row (e.g. before regenerating it)."""
+    if cover_letter.archived_at is None:
+        return
+    archived = db.query(ArchivedCoverLetterBody).filter(
+        ArchivedCoverLetterBody.cover_letter_id == cover_letter.id
+    ).first()
+    if archived:
+        body = _unpack(archived.payload)
+        cover_letter.job_description = body["job_description"]
+        cover_letter.content = body["content"]
+        db.delete(archived)
+    cover_letter.archived_at = None
+
+
+def cover_letter_bodies(db: Session, cover_letters) -> dict:
+    """{id: {"job_description", "content"}} for every given cover letter.
+
+    Hot rows are returned as-is; archived ones are fetched in one query and
+    decompressed, so callers never see the placeholder. An archived letter
+    whose body row is missing falls back to its hot columns.
+    """
+    bodies = {}
+    archived_ids = []
+    for cl in cover_letters:
+        if cl is None:
+            continue
+        bodies[cl.id] = {"job_description": cl.job_description, "content": cl.content}
+        if cl.archived_at is not None:
+            archived_ids.append(cl.id)
+    if archived_ids:
+        rows = db.query(ArchivedCoverLetterBody).filter(
+            ArchivedCoverLetterBody.cover_letter_id.in_(archived_ids)
+        ).all()
+        for row in rows:
+            bodies[row.cover_letter_id] = _unpack(row.payload)
+    return bodies
+
+
+def get_archived_application(db: Session, user_id: int, application_id: int):
+    row = db.query(ArchivedApplication).filter(
+        ArchivedApplication.id == application_id,
+        ArchivedApplication.user_id == user_id
+    ).first()
+    if not row:
+        return None
+    data = _unpack(row.payload)
+    data["archived_at"] = row.archived_at
+    return data
+
+
+def list_archived_applications(db: Session, user_id: int, statuses: list = None, company: str = None,
+                               created_from: datetime = None, created_to: datetime = None):
+    # Summary columns only; payloads stay compressed
+    query = db.query(ArchivedApplication).filter(ArchivedApplication.user_id == user_id)
+    if statuses:
+        query = query.filter(ArchivedApplication.status.in_(statuses))
+    if company:
+        query = query.filter(ArchivedApplication.company_name == company)
+    if created_from:
+        query = query.filter(ArchivedApplication.created_at >= created_from)
+    if created_to:
+        query = query.filter(ArchivedApplication.created_at < created_to)
+    return query.order_by(ArchivedApplication.id).all()
+
+
+def archive_closed_applications(db: Session, months: int = ARCHIVE_AFTER_MONTHS,
+                                batch_size: int = 500, dry_run: bool = False) -> dict:
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=30 * months)
+    last_activity = func.coalesce(Application.updated_at, Application.created_at)
+    counts = {"applications": 0, "cover_letters": 0}
+    last_id = 0
+
+    while True:
+        batch = db.query(Application).filter(
+            Application.id > last_id,
+            Application.status.in_(CLOSED_STATUSES),
+            last_activity < cutoff
+        ).order_by(Application.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        counts["applications"] += len(batch)
+        if dry_run:
+            continue
+
+        cover_letter_ids = {a.cover_letter_id for a in batch if a.cover_letter_id}
+        for app in batch:
+            db.add(ArchivedApplication(
+                id=app.id,
+                user_id=app.user_id,
+                company_name=app.company_name,
+                position=app.position,
+                status=app.status,
+                created_at=app.created_at,
+                archived_at=now,
+                payload=_pack(_row_dict(app)),
+            ))
+            db.delete(app)
+        db.flush()
+
+        if cover_letter_ids:
+            still_used = {
+                cl_id for (cl_id,) in db.query(Application.cover_letter_id)
+                .filter(Application.cover_letter_id.in_(cover_letter_ids)).distinct()
+            }
+            candidates = db.query(CoverLetter).filter(
+                CoverLetter.id.in_(cover_letter_ids - still_used),
+                CoverLetter.archived_at.is_(None),
+                CoverLetter.created_at < cutoff
+            ).all()
+            for cl in candidates:
+                archive_cover_letter(db, cl, now)
+            counts["cover_letters"] += len(candidates)
+
+        db.commit()
+        db.expunge_all()
+        print(f"… up to application {last_id}: {counts['applications']} applications, "
+              f"{counts['cover_letters']} cover letters archived")
+    return counts
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Archive closed applications and their cover letters")
+    parser.add_argument("--months", type=int, default=ARCHIVE_AFTER_MONTHS)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    ensure_archive_schema(engine)
+    db = SessionLocal()
+    try:
+        result = archive_closed_applications(db, args.months, args.batch_size, args.dry_run)
+    finally:
+        db.close()
+    verb = "Would archive" if args.dry_run else "Archived"
+    print(f"✅ {verb} {result['applications']} application(s) and {result['cover_letters']} cover letter body(ies)")
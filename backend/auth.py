@@ -4,6 +4,7 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 import models, schemas
 from database import get_db
@@ -64,4 +65,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     return user
 
 async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+def ensure_user_schema(engine):
+    """Add users.is_admin to databases created before admin accounts existed."""
+    columns = {c["name"] for c in inspect(engine).get_columns("users")}
+    if "is_admin" not in columns:
+        default = "false" if engine.dialect.name == "postgresql" else "0"
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE users ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT {default}"))
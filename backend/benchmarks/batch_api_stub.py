@@ -0,0 +1,168 @@
+# benchmarks/batch_api_stub.py
+# Local stand-in for the OpenAI Files and Batch endpoints used by resume_analysis.py.
+#
+# Batches complete --delay seconds after they are created. Every request is
+# answered with canned feedback for each section its function schema asks for;
+# with --fail-every N, every Nth request gets an error instead. State lives in
+# memory, so restart the stub and the job together.
+#
+#   python benchmarks/batch_api_stub.py --port 8089 --delay 5
+#   OPENAI_BATCH_BASE_URL=http://127.0.0.1:8089/v1 python resume_analysis.py run --poll-seconds 2
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ids = itertools.count(1)
+_files = {}    # id -> (metadata, bytes)
+_batches = {}  # id -> batch object
+_lock = threading.Lock()
+config = {"delay": 5.0, "fail_every": 0}
+
+
+def _new_file(filename: str, purpose: str, data: bytes) -> dict:
+    meta = {
+        "id": f"file-{next(_ids)}", "object": "file", "bytes": len(data), "created_at": int(time.time()),
+        "filename": filename, "purpose": purpose, "status": "processed",
+    }
+    _files[meta["id"]] = (meta, data)
+    return meta
+
+
+def _answer(body: dict, n: int) -> dict:
+    function = body["tools"][0]["function"]
+    sections = function["parameters"].get("required", [])
+    arguments = json.dumps({
+        name: {
+            "formatting_issues": [],
+            "content_suggestions": [f"Quantify the results in your {name} section."],
+            "strengths": [f"The {name} section is clear."],
+            "weaknesses": [],
+        }
+        for name in sections
+    })
+    prompt = " ".join(m.get("content") or "" for m in body.get("messages", []))
+    return {
+        "id": f"chatcmpl-stub-{n}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-3.5-turbo"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{n}", "type": "function",
+                "function": {"name": function["name"], "arguments": arguments},
+            }]},
+            "finish_reason": "tool_calls",
+        }],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(arguments) // 4,
+                  "total_tokens": (len(prompt) + len(arguments)) // 4},
+    }
+
+
+def _complete(batch: dict):
+    _, data = _files[batch["input_file_id"]]
+    output, errors = [], []
+    for n, line in enumerate(data.decode("utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        if config["fail_every"] and n % config["fail_every"] == 0:
+            errors.append({"id": f"batch_req_{n}", "custom_id": request["custom_id"], "response": {
+                "status_code": 500, "body": {"error": {"message": "stub failure", "type": "server_error"}},
+            }, "error": None})
+        else:
+            output.append({"id": f"batch_req_{n}", "custom_id": request["custom_id"], "response": {
+                "status_code": 200, "request_id": f"req_{n}", "body": _answer(request["body"], n),
+            }, "error": None})
+    batch["request_counts"] = {"total": len(output) + len(errors), "completed": len(output), "failed": len(errors)}
+    if output:
+        batch["output_file_id"] = _new_file(f"{batch['id']}_output.jsonl", "batch_output",
+                                            "".join(json.dumps(r) + "\n" for r in output).encode())["id"]
+    if errors:
+        batch["error_file_id"] = _new_file(f"{batch['id']}_errors.jsonl", "batch_output",
+                                           "".join(json.dumps(r) + "\n" for r in errors).encode())["id"]
+    batch["status"] = "completed"
+    batch["completed_at"] = int(time.time())
+
+
+def _refresh(batch: dict) -> dict:
+    if batch["status"] != "completed" and time.time() - batch["created_at"] >= config["delay"]:
+        _complete(batch)
+    elif batch["status"] == "validating":
+        batch["status"] = "in_progress"
+    return batch
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status: int, payload, raw: bool = False):
+        body = payload if raw else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self):
+        self._send(404, {"error": {"message": f"No route for {self.command} {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with _lock:
+            if self.path == "/v1/files":
+                message = BytesParser(policy=default_policy).parsebytes(
+                    b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body
+                )
+                fields = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+                upload = fields["file"]
+                purpose = fields["purpose"].get_payload(decode=True).decode()
+                return self._send(200, _new_file(upload.get_filename(), purpose, upload.get_payload(decode=True)))
+            if self.path == "/v1/batches":
+                request = json.loads(body)
+                if request.get("input_file_id") not in _files:
+                    return self._send(400, {"error": {"message": "unknown input_file_id", "type": "invalid_request_error"}})
+                batch = {
+                    "id": f"batch_{next(_ids)}", "object": "batch", "endpoint": request["endpoint"],
+                    "input_file_id": request["input_file_id"], "completion_window": request["completion_window"],
+                    "status": "validating", "output_file_id": None, "error_file_id": None, "errors": None,
+                    "created_at": int(time.time()), "completed_at": None,
+                    "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                    "metadata": request.get("metadata"),
+                }
+                _batches[batch["id"]] = batch
+                return self._send(200, batch)
+        self._not_found()
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        with _lock:
+            if path == "/v1/batches":
+                data = [_refresh(b) for b in sorted(_batches.values(), key=lambda b: b["created_at"], reverse=True)]
+                return self._send(200, {"object": "list", "data": data, "has_more": False})
+            match = re.fullmatch(r"/v1/batches/([\w-]+)", path)
+            if match and match.group(1) in _batches:
+                return self._send(200, _refresh(_batches[match.group(1)]))
+            match = re.fullmatch(r"/v1/files/([\w-]+)/content", path)
+            if match and match.group(1) in _files:
+                return self._send(200, _files[match.group(1)][1], raw=True)
+        self._not_found()
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stub of the OpenAI Batch API")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=5.0, help="seconds before a batch completes")
+    parser.add_argument("--fail-every", type=int, default=0, help="fail every Nth request (0 = never)")
+    args = parser.parse_args()
+
+    config.update(delay=args.delay, fail_every=args.fail_every)
+    print(f"✅ Batch API stub on http://127.0.0.1:{args.port}/v1")
+    ThreadingHTTPServer(("127.0.0.1", args.port), Handler).serve_forever()
@@ -0,0 +1,84 @@
+# benchmarks/bench_extract.py
+# Compare resume text extractors on the synthetic corpus: throughput (files/s,
+# MB/s) and coverage (share of ground-truth words found) per document region.
+#
+#   python benchmarks/bench_extract.py [--count 50] [--repeat 3]
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from PyPDF2 import PdfReader
+from document_text import extract_text_from_docx, extract_text_from_pdf
+from resume_corpus import build_corpus
+
+
+# Baselines: the extractors routers/resumes.py used before document_text.py
+def legacy_extract_text_from_pdf(file_path: str) -> str:
+    with open(file_path, 'rb') as file:
+        pdf = PdfReader(file)
+        text = ""
+        for page in pdf.pages:
+            text += page.extract_text()
+    return text
+
+def legacy_extract_text_from_docx(file_path: str) -> str:
+    doc = Document(file_path)
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text
+
+
+EXTRACTORS = {
+    "docx": {"legacy": legacy_extract_text_from_docx, "streaming": extract_text_from_docx},
+    "pdf": {"legacy": legacy_extract_text_from_pdf, "current": extract_text_from_pdf},
+}
+
+
+def coverage(text: str, expected: dict) -> dict:
+    found = set(re.findall(r"\w+", text))
+    return {
+        region: (sum(1 for w in words if w in found) / len(words)) if words else 1.0
+        for region, words in expected.items()
+    }
+
+
+def run(manifest: list, repeat: int):
+    for fmt, extractors in EXTRACTORS.items():
+        files = [entry for entry in manifest if entry["format"] == fmt]
+        total_bytes = sum(os.path.getsize(entry["path"]) for entry in files)
+        print(f"\n{fmt.upper()}: {len(files)} files, {total_bytes / 1e6:.2f} MB")
+        for name, extract in extractors.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                texts = [extract(entry["path"]) for entry in files]
+                best = min(best, time.perf_counter() - start)
+            regions = {}
+            for entry, text in zip(files, texts):
+                for region, score in coverage(text, entry["expected"]).items():
+                    regions.setdefault(region, []).append(score)
+            cov = "  ".join(f"{r}={sum(s) / len(s):6.1%}" for r, s in sorted(regions.items()))
+            print(
+                f"  {name:<10} {len(files) / best:8.1f} files/s  {total_bytes / 1e6 / best:6.2f} MB/s  {cov}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark resume text extraction")
+    parser.add_argument("--count", type=int, default=50, help="resumes per format")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--corpus", help="reuse/write the corpus here instead of a temp dir")
+    args = parser.parse_args()
+
+    if args.corpus:
+        run(build_corpus(args.corpus, args.count), args.repeat)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(build_corpus(tmp, args.count), args.repeat)
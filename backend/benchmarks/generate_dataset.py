@@ -0,0 +1,261 @@
+# benchmarks/generate_dataset.py
+# Fill a database with a synthetic, production-shaped dataset for scale testing.
+#
+# Users get a few resumes (multi-KB text), cover letters and many applications
+# whose statuses, creation dates and deadlines follow skewed distributions, plus
+# the matching status history. Rows go into the existing models.py tables: COPY
+# on Postgres, batched executemany on SQLite. Ids continue after the current
+# maximum, so the script can be run repeatedly against the same database.
+#
+#   python benchmarks/generate_dataset.py --users 10000 --applications 50
+#   DATABASE_URL=postgresql://... python benchmarks/generate_dataset.py --users 200000
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import JSON, func, select, text
+from database import Base, engine
+from models import (User, Resume, CoverLetter, Company, Application, ApplicationStatusChange,
+                    ensure_indexes)
+from companies import ensure_company_schema, normalize_name
+from resume_parser import parse_resume
+from search_index import ensure_search_schema
+from archive import ensure_archive_schema
+from auth import ensure_user_schema
+from resume_versions import ensure_resume_version_schema
+from resume_analysis import ensure_resume_analysis_schema
+from resume_corpus import COMPANIES, OBJECTS, SKILLS, TITLES, VERBS, _resume_content
+
+# Final status -> weight, and the path an application took to get there
+STATUS_WEIGHTS = {"applied": 45, "rejected": 25, "interview": 18, "offer": 5, "accepted": 3, "draft": 4}
+STATUS_PATHS = {
+    "draft": ["draft"],
+    "applied": ["applied"],
+    "interview": ["applied", "interview"],
+    "offer": ["applied", "interview", "offer"],
+    "accepted": ["applied", "interview", "offer", "accepted"],
+}
+TONES = ["professional", "enthusiastic", "confident", "friendly"]
+INDUSTRIES = ["Software", "Finance", "Healthcare", "Retail", "Logistics", "Media", None]
+COMPANY_WORDS = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Vandelay",
+                 "Soylent", "Tyrell", "Cyberdyne", "Wonka", "Aperture", "Massive", "Pied Piper"]
+COMPANY_KINDS = ["Labs", "Systems", "Analytics", "Health", "Capital", "Logistics", "Studios", "Cloud"]
+# Every generated user can log in with this password
+PASSWORD = "loadtest"
+
+
+def _next_id(conn, model) -> int:
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _resume_text(rng: random.Random) -> str:
+    content = _resume_content(rng, size=rng.choice([1, 2, 3, 4, 6, 10]))
+    lines = [content["name"], content["contact"], "", "SUMMARY", content["summary"], "", "EXPERIENCE"]
+    for job in content["jobs"]:
+        lines.append(job["header"])
+        lines.extend(f"• {bullet}" for bullet in job["bullets"])
+    lines += ["", "SKILLS", ", ".join(content["skills"]), "", content["footer"]]
+    return "\n".join(lines)
+
+
+def _job_description(rng: random.Random, title: str, company: str) -> str:
+    duties = [f"{rng.choice(VERBS)} our {rng.choice(OBJECTS)}" for _ in range(rng.randint(4, 10))]
+    skills = ", ".join(rng.sample(SKILLS, rng.randint(3, 7)))
+    return (f"{company} is hiring a {title}.\n\nResponsibilities:\n" + "\n".join(f"- {d}" for d in duties) +
+            f"\n\nRequirements: {skills}.\n" + "We offer flexible working and a learning budget. " * rng.randint(1, 6))
+
+
+def _cover_letter(rng: random.Random, title: str, company: str) -> str:
+    paragraphs = [f"Dear Hiring Manager,\n\nI am excited to apply for the {title} role at {company}."]
+    for _ in range(rng.randint(2, 5)):
+        paragraphs.append(" ".join(
+            f"I {rng.choice(VERBS).lower()} the {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}."
+            for _ in range(rng.randint(3, 6))
+        ))
+    paragraphs.append("Thank you for your consideration.\n\nKind regards")
+    return "\n\n".join(paragraphs)
+
+
+def _created_at(rng: random.Random, now: datetime, months: int) -> datetime:
+    # Skewed towards recent activity: most rows are from the last few months
+    days = min(rng.expovariate(1 / (months * 30 / 4)), months * 30)
+    return now - timedelta(days=days, seconds=rng.randint(0, 86399))
+
+
+class Loader:
+    """Bulk-loads lists of row dicts: COPY on Postgres, executemany elsewhere."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.postgres = conn.dialect.name == "postgresql"
+        self.rows = {}
+
+    def load(self, model, rows: list):
+        if not rows:
+            return
+        table = model.__table__
+        columns = list(rows[0])
+        if not self.postgres:
+            self.conn.execute(table.insert(), rows)
+        else:
+            json_columns = {c.name for c in table.columns if isinstance(c.type, JSON)}
+            cursor = self.conn.connection.driver_connection.cursor()
+            with cursor.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row([
+                        json.dumps(row[c]) if c in json_columns and row[c] is not None else row[c]
+                        for c in columns
+                    ])
+        self.rows[table.name] = self.rows.get(table.name, 0) + len(rows)
+
+    def reset_sequences(self, models):
+        # COPY with explicit ids doesn't advance the serial sequences
+        if self.postgres:
+            for model in models:
+                name = model.__table__.name
+                self.conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {name}))"
+                ))
+
+
+def generate(users: int, resumes: int, cover_letters: int, applications: int, companies: int,
+             months: int, batch_users: int, parse: bool, seed: int) -> dict:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = User.get_password_hash(PASSWORD)
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+
+    with engine.begin() as conn:
+        ids = {model: _next_id(conn, model)
+               for model in (User, Resume, CoverLetter, Company, Application, ApplicationStatusChange)}
+
+    with engine.begin() as conn:
+        loader = Loader(conn)
+        company_rows = []
+        for _ in range(companies):
+            cid = ids[Company]
+            ids[Company] += 1
+            name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_KINDS)} {cid}"
+            company_rows.append({"id": cid, "name": name, "normalized_name": normalize_name(name),
+                                 "industry": rng.choice(INDUSTRIES), "created_at": now})
+        loader.load(Company, company_rows)
+        totals = dict(loader.rows)
+
+    # A handful of employers get most of the applications
+    company_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(company_rows))))
+
+    started = time.monotonic()
+    for first in range(0, users, batch_users):
+        batch = {model: [] for model in (User, Resume, CoverLetter, Application, ApplicationStatusChange)}
+        for _ in range(min(batch_users, users - first)):
+            uid = ids[User]
+            ids[User] += 1
+            joined = _created_at(rng, now, months)
+            batch[User].append({"id": uid, "email": f"loadtest{uid}@example.com", "full_name": f"Load Test {uid}",
+                                "hashed_password": password_hash, "is_admin": False, "created_at": joined})
+
+            resume_ids = []
+            for _ in range(max(1, int(rng.gauss(resumes, resumes / 2)))):
+                rid = ids[Resume]
+                ids[Resume] += 1
+                resume_ids.append(rid)
+                body = _resume_text(rng)
+                batch[Resume].append({"id": rid, "user_id": uid, "file_path": f"uploads/loadtest/{rid}.pdf",
+                                      "file_name": f"resume_{rid}.pdf",
+                                      "parsed_data": parse_resume(body) if parse else {"text": body},
+                                      "ai_feedback": None, "created_at": joined})
+
+            letter_ids = []
+            for _ in range(max(0, int(rng.gauss(cover_letters, cover_letters / 2)))):
+                clid = ids[CoverLetter]
+                ids[CoverLetter] += 1
+                letter_ids.append(clid)
+                title, company = rng.choice(TITLES), rng.choice(COMPANIES)
+                batch[CoverLetter].append({"id": clid, "user_id": uid, "resume_id": rng.choice(resume_ids),
+                                           "job_description": _job_description(rng, title, company),
+                                           "content": _cover_letter(rng, title, company),
+                                           "tone": rng.choice(TONES), "created_at": _created_at(rng, now, months)})
+
+            # Heavy-tailed: most users track a few applications, some track hundreds
+            for _ in range(max(1, int(rng.paretovariate(1.5) * applications / 3))):
+                aid = ids[Application]
+                ids[Application] += 1
+                company = rng.choices(company_rows, cum_weights=company_weights)[0] if company_rows else None
+                status = rng.choices(statuses, weights)[0]
+                created = _created_at(rng, now, months)
+                deadline = created + timedelta(days=rng.randint(3, 60)) if rng.random() < 0.6 else None
+                batch[Application].append({
+                    "id": aid, "user_id": uid, "resume_id": rng.choice(resume_ids),
+                    "cover_letter_id": rng.choice(letter_ids) if letter_ids and rng.random() < 0.4 else None,
+                    "company_id": company["id"] if company else None,
+                    "company_name": company["name"] if company else rng.choice(COMPANIES),
+                    "position": rng.choice(TITLES), "job_url": f"https://jobs.example.com/{aid}",
+                    "application_deadline": deadline, "status": status, "notes": None,
+                    "created_at": created, "updated_at": None,
+                })
+
+                # Rejections can happen after any stage of the path
+                path = STATUS_PATHS.get(status) or STATUS_PATHS[rng.choice(["applied", "interview", "offer"])] + ["rejected"]
+                changed, previous = created, None
+                for stage in path:
+                    batch[ApplicationStatusChange].append({
+                        "id": ids[ApplicationStatusChange], "application_id": aid, "user_id": uid,
+                        "from_status": previous, "to_status": stage, "changed_at": changed,
+                    })
+                    ids[ApplicationStatusChange] += 1
+                    previous = stage
+                    changed = min(changed + timedelta(days=rng.expovariate(1 / 9)), now)
+                batch[Application][-1]["updated_at"] = changed if len(path) > 1 else None
+
+        # One transaction per batch, parents before children
+        with engine.begin() as conn:
+            loader = Loader(conn)
+            for model, rows in batch.items():
+                loader.load(model, rows)
+            for name, count in loader.rows.items():
+                totals[name] = totals.get(name, 0) + count
+
+        done = min(first + batch_users, users)
+        rate = totals.get("applications", 0) / max(time.monotonic() - started, 1e-9)
+        print(f"… {done}/{users} users, {totals.get('applications', 0)} applications ({rate:,.0f}/s)")
+
+    with engine.begin() as conn:
+        Loader(conn).reset_sequences((User, Resume, CoverLetter, Company, Application, ApplicationStatusChange))
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for scale testing")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--resumes", type=float, default=2, help="average resumes per user")
+    parser.add_argument("--cover-letters", type=float, default=3, help="average cover letters per user")
+    parser.add_argument("--applications", type=float, default=25, help="average applications per user")
+    parser.add_argument("--companies", type=int, default=5000)
+    parser.add_argument("--months", type=int, default=24, help="how far back creation dates go")
+    parser.add_argument("--batch-users", type=int, default=500, help="users per insert transaction")
+    parser.add_argument("--parse", action="store_true",
+                        help="store fully parsed resumes (slower) instead of raw text")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    ensure_search_schema(engine)
+    ensure_archive_schema(engine)
+    ensure_company_schema(engine)
+    ensure_user_schema(engine)
+    ensure_resume_version_schema(engine)
+    ensure_resume_analysis_schema(engine)
+    ensure_indexes(engine)
+    totals = generate(args.users, args.resumes, args.cover_letters, args.applications, args.companies,
+                      args.months, args.batch_users, args.parse, args.seed)
+    print("✅ Inserted " + ", ".join(f"{count:,} {name}" for name, count in totals.items()))
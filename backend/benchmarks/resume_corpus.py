@@ -0,0 +1,173 @@
+# benchmarks/resume_corpus.py
+# Deterministic synthetic resume corpus for the extraction benchmark.
+#
+# Each generated DOCX puts text where real resume templates do: body paragraphs,
+# a skills table, a floating text box and the page header/footer. The words
+# written into each region are returned as ground truth so extractors can be
+# scored on coverage, not just speed.
+#
+#   python benchmarks/resume_corpus.py --out benchmarks/corpus --count 50
+import argparse
+import json
+import os
+import random
+import re
+from docx import Document
+from docx.oxml import parse_xml
+
+FIRST_NAMES = ["Ada", "Chinedu", "Grace", "Kwame", "Linus", "Mariam", "Tomiwa", "Yuki"]
+LAST_NAMES = ["Okafor", "Hopper", "Mensah", "Torvalds", "Bello", "Tanaka", "Adeyemi", "Lovelace"]
+TITLES = ["Software Engineer", "Data Analyst", "Product Manager", "DevOps Engineer", "QA Engineer"]
+COMPANIES = ["Acme Inc", "Globex Ltd", "Initech", "Umbrella Corp", "Hooli", "Stark Industries"]
+SKILLS = ["Python", "FastAPI", "PostgreSQL", "Kubernetes", "Docker", "React", "TypeScript",
+          "Terraform", "AWS", "GraphQL", "Redis", "Airflow", "Pandas", "Tableau", "Jira"]
+VERBS = ["Built", "Led", "Designed", "Migrated", "Automated", "Optimised", "Launched", "Scaled"]
+OBJECTS = ["billing pipeline", "search service", "reporting suite", "CI system", "mobile API",
+           "data warehouse", "onboarding flow", "alerting stack"]
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+TEXTBOX_XML = (
+    '<w:r xmlns:w="{w}" xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml">'
+    '<mc:AlternateContent><mc:Choice Requires="wps"><w:drawing><wps:txbx><w:txbxContent>'
+    '<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+    '</w:txbxContent></wps:txbx></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+    '</w:txbxContent></v:textbox></w:pict></mc:Fallback></mc:AlternateContent></w:r>'
+)
+
+
+def _resume_content(rng: random.Random, size: int) -> dict:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    jobs = []
+    for _ in range(size):
+        bullets = [
+            f"{rng.choice(VERBS)} the {rng.choice(OBJECTS)} serving {rng.randint(2, 900)}k users"
+            for _ in range(rng.randint(3, 6))
+        ]
+        start = rng.randint(2008, 2020)
+        jobs.append({
+            "header": f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}  {start} - {start + rng.randint(1, 4)}",
+            "bullets": bullets,
+        })
+    return {
+        "name": name,
+        "contact": f"{name.split()[0].lower()}@example.com | +44 20 7946 {rng.randint(1000, 9999)}",
+        "summary": f"{rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience.",
+        "jobs": jobs,
+        "skills": rng.sample(SKILLS, 8),
+        "textbox": f"Available from {rng.choice(['January', 'March', 'June'])} {rng.randint(2025, 2027)}",
+        "footer": f"References available on request ref{rng.randint(100, 999)}",
+    }
+
+
+def _words(*chunks) -> list:
+    return sorted({w for chunk in chunks for w in re.findall(r"\w+", chunk)})
+
+
+def write_docx(path: str, content: dict) -> dict:
+    doc = Document()
+    section = doc.sections[0]
+    section.header.paragraphs[0].text = f"{content['name']} — {content['contact']}"
+    section.footer.paragraphs[0].text = content["footer"]
+
+    doc.add_heading("Summary", level=1)
+    summary = doc.add_paragraph(content["summary"])
+    summary._p.append(parse_xml(TEXTBOX_XML.format(w=W_NS, text=content["textbox"])))
+
+    doc.add_heading("Experience", level=1)
+    for job in content["jobs"]:
+        doc.add_paragraph(job["header"])
+        for bullet in job["bullets"]:
+            doc.add_paragraph(bullet, style="List Bullet")
+
+    doc.add_heading("Skills", level=1)
+    table = doc.add_table(rows=2, cols=4)
+    for i, skill in enumerate(content["skills"]):
+        table.cell(i // 4, i % 4).text = skill
+    doc.save(path)
+
+    body = [content["summary"]] + [j["header"] for j in content["jobs"]] + \
+        [b for j in content["jobs"] for b in j["bullets"]]
+    return {
+        "body": _words(*body),
+        "table": _words(*content["skills"]),
+        "textbox": _words(content["textbox"]),
+        "header_footer": _words(content["name"], content["contact"], content["footer"]),
+    }
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, content: dict, lines_per_page: int = 48) -> dict:
+    """Minimal multi-page PDF using the built-in Helvetica font."""
+    lines = [content["name"], content["contact"], "", "Summary", content["summary"], "", "Experience"]
+    for job in content["jobs"]:
+        lines.append(job["header"])
+        lines.extend(f"- {b}" for b in job["bullets"])
+    lines += ["", "Skills", ", ".join(content["skills"]), "", content["footer"]]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {len(pages)} >>")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        for line in page_lines:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects) + 2} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as fh:
+        fh.write(bytes(out))
+
+    body = [content["name"], content["contact"], content["summary"], content["footer"]] + \
+        [j["header"] for j in content["jobs"]] + [b for j in content["jobs"] for b in j["bullets"]]
+    return {"body": _words(*body), "table": _words(*content["skills"])}
+
+
+def build_corpus(out_dir: str, count: int = 50, seed: int = 42) -> list:
+    """Write ``count`` DOCX and ``count`` PDF resumes; returns the manifest entries."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    for i in range(count):
+        # Mix short one-job resumes with long multi-page ones
+        content = _resume_content(rng, size=rng.choice([1, 3, 6, 12]))
+        for ext, writer in (("docx", write_docx), ("pdf", write_pdf)):
+            path = os.path.join(out_dir, f"resume_{i:04d}.{ext}")
+            manifest.append({"path": path, "format": ext, "expected": writer(path, content)})
+    with open(os.path.join(out_dir, "manifest.json"), "w") as fh:
+        json.dump(manifest, fh, indent=1)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    entries = build_corpus(args.out, args.count, args.seed)
+    print(f"✅ Wrote {len(entries)} files to {args.out}")
@@ -0,0 +1,207 @@
+# companies.py
+# Resolve free-text company names to Company rows.
+#
+# Names are normalized (case folding, punctuation and legal suffixes stripped)
+# and looked up in an in-memory index; near misses such as typos are matched
+# with trigram similarity. Misses create a Company whose unique normalized_name
+# makes concurrent workers converge on a single row.
+#
+#   python companies.py backfill [--batch-size 500]
+import argparse
+import re
+import threading
+import unicodedata
+from collections import Counter
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import Application, Company
+
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "ltd", "limited", "llc", "llp", "plc", "corp", "corporation",
+    "co", "company", "gmbh", "ag", "sa", "sas", "srl", "bv", "nv", "pty", "oy", "ab", "as",
+    "group", "holdings",
+}
+# Dice coefficient over trigrams
+FUZZY_THRESHOLD = 0.6
+# Below this length a single changed letter is often a different company
+# ("Stripe" vs "Stride"), so only transpositions and dropped/extra letters match
+FUZZY_SHORT_LENGTH = 8
+
+
+def normalize_name(name: str) -> str:
+    folded = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().casefold()
+    folded = folded.replace("&", " and ")
+    words = re.findall(r"[a-z0-9]+", folded)
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    if len(words) > 1 and words[0] == "the":
+        words.pop(0)
+    return " ".join(words)
+
+
+def trigrams(normalized: str) -> set:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _is_slip(a: str, b: str) -> bool:
+    """True if b is a with two adjacent letters swapped, or one letter added/dropped."""
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+    if abs(len(a) - len(b)) != 1:
+        return False
+    longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+    return any(longer[:i] + longer[i + 1:] == shorter for i in range(len(longer)))
+
+
+class CompanyIndex:
+    """normalized name -> company id, with a trigram inverted index for fuzzy lookups."""
+
+    def __init__(self):
+        self._ids = {}
+        self._grams = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        with self._lock:
+            self._ids.clear()
+            self._grams.clear()
+            for company_id, normalized in db.query(Company.id, Company.normalized_name):
+                if normalized:
+                    self._add(normalized, company_id)
+            self._loaded = True
+
+    def _add(self, normalized: str, company_id: int):
+        self._ids[normalized] = company_id
+        for gram in trigrams(normalized):
+            self._grams.setdefault(gram, set()).add(normalized)
+
+    def add(self, normalized: str, company_id: int):
+        with self._lock:
+            self._add(normalized, company_id)
+
+    def lookup(self, db: Session, normalized: str):
+        if not self._loaded:
+            self.load(db)
+        if normalized in self._ids:
+            return self._ids[normalized]
+
+        grams = trigrams(normalized)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        for candidate, common in shared.most_common(20):
+            if len(normalized) < FUZZY_SHORT_LENGTH or len(candidate) < FUZZY_SHORT_LENGTH:
+                if _is_slip(normalized, candidate):
+                    return self._ids[candidate]
+            elif 2 * common / (len(grams) + len(trigrams(candidate))) >= FUZZY_THRESHOLD:
+                return self._ids[candidate]
+        return None
+
+
+company_index = CompanyIndex()
+
+
+# Companies created inside a transaction only enter the shared index once it
+# commits, so a rolled-back request can't leave a dangling id behind
+@event.listens_for(Session, "after_commit")
+def _index_new_companies(session):
+    for normalized, company_id in session.info.pop("new_companies", []):
+        company_index.add(normalized, company_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_new_companies(session):
+    session.info.pop("new_companies", None)
+
+
+def ensure_company_schema(engine: Engine):
+    """Add companies.normalized_name and the applications.company_id index to older databases."""
+    columns = {c["name"] for c in inspect(engine).get_columns("companies")}
+    with engine.begin() as conn:
+        if "normalized_name" not in columns:
+            conn.execute(text("ALTER TABLE companies ADD COLUMN normalized_name VARCHAR"))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_companies_normalized_name ON companies (normalized_name)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_applications_company_id ON applications (company_id)"
+        ))
+
+
+def resolve_company(db: Session, name: str):
+    """Company id for a free-text name, creating the company if nothing matches."""
+    normalized = normalize_name(name)
+    if not normalized:
+        return None
+
+    company_id = company_index.lookup(db, normalized)
+    if company_id is not None:
+        return company_id
+
+    # Another worker may have created it since our index was loaded
+    existing = db.query(Company.id).filter(Company.normalized_name == normalized).scalar()
+    if existing is None:
+        company = Company(name=name.strip(), normalized_name=normalized)
+        try:
+            with db.begin_nested():
+                db.add(company)
+            db.info.setdefault("new_companies", []).append((normalized, company.id))
+            return company.id
+        except IntegrityError:
+            # Either unique column may have collided, possibly with two different rows
+            existing = db.query(Company.id).filter(Company.normalized_name == normalized).scalar()
+            if existing is None:
+                row = db.query(Company.id).filter(Company.name == name.strip()).first()
+                existing = row.id if row else None
+    if existing is not None:
+        company_index.add(normalized, existing)
+    return existing
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    """Set company_id on every application that doesn't have one yet."""
+    # Companies created before normalization existed
+    for company in db.query(Company).filter(Company.normalized_name.is_(None)):
+        company.normalized_name = normalize_name(company.name)
+    db.commit()
+    company_index.load(db)
+
+    updated = 0
+    last_id = 0
+    while True:
+        batch = db.query(Application).filter(
+            Application.id > last_id,
+            Application.company_id.is_(None)
+        ).order_by(Application.id).limit(batch_size).all()
+        if not batch:
+            break
+        for app in batch:
+            app.company_id = resolve_company(db, app.company_name)
+            updated += 1
+        last_id = batch[-1].id
+        db.commit()
+        db.expunge_all()
+        print(f"… up to application {last_id}: {updated} linked")
+    return updated
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Company normalization tools")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    ensure_company_schema(engine)
+    db = SessionLocal()
+    try:
+        count = backfill(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"✅ Linked {count} application(s) to companies")
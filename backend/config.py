@@ -12,6 +12,12 @@ class Settings(BaseSettings):
     
     # OpenAI settings
     OPENAI_API_KEY: str = ""  # Set this in environment variables
+    # JSON overrides for per-task model routes, see model_router.py
+    MODEL_ROUTES: str = ""
+    # JSON overrides for USD prices per 1M tokens, see llm_usage.py
+    LLM_PRICES: str = ""
+    # Batch API base URL for resume re-analysis jobs (a local stub in development)
+    OPENAI_BATCH_BASE_URL: str = ""
     
     # File upload settings
     UPLOAD_DIR: str = "uploads"
@@ -0,0 +1,230 @@
+# cover_letter_export.py
+# Render cover letters to PDF/DOCX, with a size-bounded on-disk cache.
+#
+# Rendering is CPU-bound, so it runs in a process pool off the event loop.
+# Output depends only on (letter text, template, format), which is the cache
+# key: re-downloads, and the same letter attached to several applications, are
+# served from EXPORT_CACHE_DIR. The cache is shared by every worker on the
+# host; the least recently used files are evicted once it grows past
+# EXPORT_CACHE_MAX_BYTES.
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from docx import Document
+from docx.shared import Pt
+from config import settings
+
+EXPORT_FORMATS = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+# Font size (pt), line height (pt) and page margins (pt) per template
+TEMPLATES = {
+    "classic": {"size": 11, "leading": 15, "margin": 72},
+    "compact": {"size": 10, "leading": 13, "margin": 54},
+}
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(settings.UPLOAD_DIR, "exports"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4
+# Helvetica advance widths (1/1000 em) for ASCII 32..126, from the standard AFM
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+
+def _text_width(line: str, size: float) -> float:
+    return sum(
+        _HELVETICA_WIDTHS[ord(ch) - 32] if 32 <= ord(ch) <= 126 else 556 for ch in line
+    ) * size / 1000
+
+
+def _wrap(paragraph: str, size: float, max_width: float) -> list:
+    lines, current = [], ""
+    for word in paragraph.split():
+        candidate = f"{current} {word}" if current else word
+        if _text_width(candidate, size) <= max_width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        # A single word wider than the line (a long URL) is hard-broken
+        while _text_width(word, size) > max_width:
+            cut = max(1, int(len(word) * max_width / _text_width(word, size)))
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    lines.append(current)
+    return lines
+
+
+def _pdf_escape(line: bytes) -> bytes:
+    return line.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def render_pdf(content: str, template: str = "classic") -> bytes:
+    style = TEMPLATES[template]
+    size, leading, margin = style["size"], style["leading"], style["margin"]
+    lines = []
+    for paragraph in content.replace("\r\n", "\n").split("\n"):
+        lines.extend(_wrap(paragraph, size, PAGE_WIDTH - 2 * margin) if paragraph.strip() else [""])
+    per_page = int((PAGE_HEIGHT - 2 * margin) // leading)
+    pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for page_lines in pages:
+        ops = [b"BT", b"/F1 %d Tf" % size, b"%d TL" % leading, b"%d %d Td" % (margin, PAGE_HEIGHT - margin - size)]
+        for line in page_lines:
+            ops.append(b"(" + _pdf_escape(line.encode("cp1252", "replace")) + b") Tj T*")
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        page_ids.append(len(objects) + 1)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, len(objects) + 2)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % p for p in page_ids), len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_docx(content: str, template: str = "classic") -> bytes:
+    style = TEMPLATES[template]
+    doc = Document()
+    normal = doc.styles["Normal"]
+    normal.font.name = "Arial"
+    normal.font.size = Pt(style["size"])
+    normal.paragraph_format.space_after = Pt(style["leading"] - style["size"])
+    for section in doc.sections:
+        section.left_margin = section.right_margin = Pt(style["margin"])
+        section.top_margin = section.bottom_margin = Pt(style["margin"])
+    # Blank lines separate paragraphs; single newlines are kept as line breaks
+    for block in content.replace("\r\n", "\n").split("\n\n"):
+        if block.strip():
+            doc.add_paragraph(block.strip("\n"))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render(content: str, template: str, fmt: str) -> bytes:
+    return render_pdf(content, template) if fmt == "pdf" else render_docx(content, template)
+
+
+def cache_key(content: str, template: str, fmt: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{digest}_{template}.{fmt}"
+
+
+class ExportCache:
+    """Rendered files on disk, evicted least-recently-used beyond max_bytes."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write-then-rename so other workers never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, os.path.join(self.directory, key))
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+export_cache = ExportCache(EXPORT_CACHE_DIR, EXPORT_CACHE_MAX_BYTES)
+_pool = None
+_pool_lock = threading.Lock()
+# Renders in flight in this process, so concurrent requests for one key render once
+_inflight = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=EXPORT_WORKERS)
+        return _pool
+
+
+async def _render_and_store(key: str, content: str, template: str, fmt: str) -> bytes:
+    loop = asyncio.get_running_loop()
+    try:
+        data = await loop.run_in_executor(_get_pool(), render, content, template, fmt)
+        await loop.run_in_executor(None, export_cache.put, key, data)
+        return data
+    finally:
+        _inflight.pop(key, None)
+
+
+async def export_cover_letter(content: str, template: str, fmt: str):
+    """(bytes, cache_hit) for the rendered letter."""
+    key = cache_key(content, template, fmt)
+    loop = asyncio.get_running_loop()
+    cached = await loop.run_in_executor(None, export_cache.get, key)
+    if cached is not None:
+        return cached, True
+
+    pending = _inflight.get(key)
+    if pending is None:
+        pending = _inflight[key] = asyncio.ensure_future(_render_and_store(key, content, template, fmt))
+    # Every requester is shielded, the first included: one disconnecting must not
+    # cancel the render (or its cache write) the others are waiting on
+    return await asyncio.shield(pending), False
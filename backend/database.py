@@ -1,6 +1,21 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi import Request
+from config import settings
+import hashlib
+import hmac
+import itertools
 import os
+import threading
+import time
+
+def _normalize_db_url(url: str) -> str:
+    # Normalize postgres scheme for SQLAlchemy 2.x + psycopg
+    if url.startswith("postgres://"):
+        url = "postgresql+psycopg://" + url[len("postgres://"):]
+    elif url.startswith("postgresql://"):
+        url = "postgresql+psycopg://" + url[len("postgresql://"):]
+    return url
 
 def _coalesce_db_url() -> str:
     # Prefer SQLALCHEMY_DATABASE_URL, fall back to Railway's DATABASE_URL
@@ -9,30 +24,202 @@ def _coalesce_db_url() -> str:
         raise RuntimeError(
             "No database URL found. Set DATABASE_URL (or SQLALCHEMY_DATABASE_URL) in Railway."
         )
-    # Normalize postgres scheme for SQLAlchemy 2.x + psycopg
-    if url.startswith("postgres://"):
-        url = "postgresql+psycopg://" + url[len("postgres://"):]
-    elif url.startswith("postgresql://"):
-        url = "postgresql+psycopg://" + url[len("postgresql://"):]
-    return url
+    return _normalize_db_url(url)
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
 
 SQLALCHEMY_DATABASE_URL = _coalesce_db_url()
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+# Comma-separated read replicas; empty means every session uses the primary
+DATABASE_REPLICA_URLS = [
+    _normalize_db_url(u.strip())
+    for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if u.strip()
+]
+
+# Pool sizing. serve.py derives these per worker from DB_MAX_CONNECTIONS so the
+# whole deployment stays inside the Postgres connection budget.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Behind PgBouncer in transaction mode a server connection can change between
+# statements, so psycopg's server-side prepared statements must be disabled.
+DB_PGBOUNCER = _env_flag("DB_PGBOUNCER")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Replica routing
+REPLICA_HEALTH_INTERVAL = float(os.getenv("DB_REPLICA_HEALTH_INTERVAL", "10"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+# How long a client's reads stay on the primary after it wrote something
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+
+def _engine_kwargs(url: str) -> dict:
+    kwargs = {
+        "pool_pre_ping": True,  # validate connections before using
+        "pool_recycle": 1800,   # recycle stale connections (~30 min)
+        # "echo": True,         # uncomment for SQL logging
+    }
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        return kwargs
+    kwargs.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if DB_PGBOUNCER:
+        kwargs["connect_args"] = {"prepare_threshold": None}
+    return kwargs
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,     # validate connections before using
-    pool_recycle=1800,      # recycle stale connections (~30 min)
-    # echo=True,            # uncomment for SQL logging
-)
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the single writer across workers;
+    # busy_timeout makes writers wait instead of failing with "database is locked".
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+def _create_engine(url: str):
+    eng = create_engine(url, **_engine_kwargs(url))
+    if url.startswith("sqlite"):
+        event.listen(eng, "connect", _sqlite_pragmas)
+    return eng
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+
+class ReplicaSet:
+    """Round-robin over read replicas, skipping ones that fail health checks.
+
+    A replica is checked at most every REPLICA_HEALTH_INTERVAL seconds, and is
+    marked down immediately when a query on it hits a disconnect error.
+    """
+
+    def __init__(self, urls):
+        self.engines = [_create_engine(url) for url in urls]
+        self._healthy = {id(e): True for e in self.engines}
+        self._checked_at = {id(e): 0.0 for e in self.engines}
+        self._cycle = itertools.cycle(self.engines) if self.engines else None
+        self._lock = threading.Lock()
+        for eng in self.engines:
+            event.listen(eng, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect and context.engine is not None:
+            self._mark(context.engine, False)
+
+    def _mark(self, eng, healthy: bool):
+        with self._lock:
+            self._healthy[id(eng)] = healthy
+            self._checked_at[id(eng)] = time.monotonic()
+
+    def _check(self, eng) -> bool:
+        try:
+            with eng.connect() as conn:
+                if eng.dialect.name == "postgresql":
+                    # The last replayed transaction ages while the primary is idle, so
+                    # a replica that has replayed everything it received counts as
+                    # caught up whatever that timestamp says
+                    lag = conn.execute(text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                    )).scalar()
+                    return float(lag or 0) <= REPLICA_MAX_LAG_SECONDS
+                conn.execute(text("SELECT 1"))
+                return True
+        except Exception:
+            return False
+
+    def is_healthy(self, eng) -> bool:
+        if time.monotonic() - self._checked_at[id(eng)] >= REPLICA_HEALTH_INTERVAL:
+            self._mark(eng, self._check(eng))
+        return self._healthy[id(eng)]
+
+    def pick(self):
+        """Next healthy replica engine, or None to fail over to the primary."""
+        if not self.engines:
+            return None
+        for _ in range(len(self.engines)):
+            with self._lock:
+                eng = next(self._cycle)
+            if self.is_healthy(eng):
+                return eng
+        return None
+
+    def status(self):
+        return [
+            {"url": eng.url.render_as_string(hide_password=True), "healthy": self._healthy[id(eng)]}
+            for eng in self.engines
+        ]
+
+
+replicas = ReplicaSet(DATABASE_REPLICA_URLS)
+
+# The pin travels with the client, so it holds whichever worker serves the next
+# read: a signed deadline set as a cookie and also returned in a header that the
+# frontend echoes back (for clients that don't send cross-site cookies).
+def _sign(until: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), until.encode(), hashlib.sha256).hexdigest()[:32]
+
+def record_write() -> str:
+    """Token pinning the client's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    until = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+    return f"{until}.{_sign(until)}"
+
+def _pinned(token: str) -> bool:
+    until, _, signature = (token or "").rpartition(".")
+    if not until or not hmac.compare_digest(signature, _sign(until)):
+        return False
+    try:
+        return float(until) > time.time()
+    except ValueError:
+        return False
+
+def _must_read_primary(request: Request) -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return True
+    return _pinned(request.cookies.get(READ_PRIMARY_COOKIE)) or _pinned(request.headers.get(READ_PRIMARY_HEADER))
+
+def _replica_session(request: Request = None):
+    eng = None if request is not None and _must_read_primary(request) else replicas.pick()
+    if eng is None:
+        return SessionLocal()
+    db = SessionLocal(bind=eng)
+    db.info["replica"] = True  # callers caching results can tell the data may lag
+    return db
+
 # Dependency
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Dependency for read-only endpoints: a replica unless the client just wrote
+def get_read_db(request: Request):
+    db = _replica_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency for analytics: always a replica when one is healthy
+def get_analytics_db():
+    db = _replica_session()
+    try:
+        yield db
+    finally:
+        db.close()
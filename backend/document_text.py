@@ -0,0 +1,104 @@
+# document_text.py
+# Text extraction for uploaded resumes.
+#
+# DOCX files are read straight from the zip: word/document.xml plus every header
+# and footer part is parsed incrementally with iterparse, and each paragraph is
+# released (cleared and detached from its parent, along with the siblings
+# before it) as soon as its text has been collected, so memory stays bounded by
+# the largest paragraph rather than the whole document object model.
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse
+from PyPDF2 import PdfReader
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+_TEXT = W + "t"
+_TAB = W + "tab"
+_BREAKS = (W + "br", W + "cr")
+_PARAGRAPH = W + "p"
+_CELL = W + "tc"
+# Legacy VML copies of text boxes live in mc:Fallback next to the modern
+# mc:Choice version; reading both would duplicate every text box.
+_FALLBACK = MC + "Fallback"
+
+_HEADER_FOOTER = re.compile(r"^word/(header|footer)\d*\.xml$")
+
+
+def _release(elem, ancestors):
+    """Free a finished element; ElementTree has no parent links, so the caller tracks them."""
+    elem.clear()
+    if ancestors:
+        # Everything before elem in its parent has ended too and was already read
+        del ancestors[-1][:]
+
+
+def _iter_part_lines(stream):
+    """Yield one line of text per paragraph in a WordprocessingML part."""
+    # Text boxes nest whole paragraphs inside a run, so keep one buffer per open paragraph
+    stack = [[]]
+    ancestors = []
+    fallback_depth = 0
+    for event, elem in iterparse(stream, events=("start", "end")):
+        if event == "start":
+            ancestors.append(elem)
+        else:
+            ancestors.pop()
+        tag = elem.tag
+        if tag == _FALLBACK:
+            fallback_depth += 1 if event == "start" else -1
+            if event == "end":
+                _release(elem, ancestors)
+            continue
+        if fallback_depth:
+            continue
+        if event == "start":
+            if tag == _PARAGRAPH:
+                stack.append([])
+            continue
+        if tag == _TEXT:
+            if elem.text:
+                stack[-1].append(elem.text)
+        elif tag == _TAB:
+            stack[-1].append("\t")
+        elif tag in _BREAKS:
+            stack[-1].append("\n")
+        elif tag == _PARAGRAPH:
+            line = "".join(stack.pop())
+            _release(elem, ancestors)
+            if line.strip():
+                yield line
+        elif tag == _CELL:
+            _release(elem, ancestors)
+
+
+def extract_text_from_docx(file_path: str) -> str:
+    """Paragraphs, tables, text boxes, headers and footers of a DOCX file."""
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        headers = sorted(n for n in names if _HEADER_FOOTER.match(n) and "header" in n)
+        footers = sorted(n for n in names if _HEADER_FOOTER.match(n) and "footer" in n)
+
+        lines = []
+        seen_repeated = set()
+        for name in headers + ["word/document.xml"] + footers:
+            if name not in names:
+                continue
+            repeated = name != "word/document.xml"
+            with archive.open(name) as stream:
+                for line in _iter_part_lines(stream):
+                    # Sections often repeat the same header/footer; keep one copy
+                    if repeated:
+                        if line in seen_repeated:
+                            continue
+                        seen_repeated.add(line)
+                    lines.append(line)
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def extract_text_from_pdf(file_path: str) -> str:
+    with open(file_path, 'rb') as file:
+        pdf = PdfReader(file)
+        pages = [page.extract_text() or "" for page in pdf.pages]
+    return "\n".join(pages)
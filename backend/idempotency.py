@@ -0,0 +1,249 @@
+# idempotency.py
+# Idempotency-Key support for mutating endpoints.
+#
+# The first request with a given key records a fingerprint of the request and,
+# once the handler finishes, the response. Retries with the same key and the same
+# request get the stored response back without re-running the handler (no second
+# upload parse, model call or INSERT). A retry that arrives while the first is
+# still running waits for it. Reusing a key for a different request is rejected.
+# Keys are scoped to the user the bearer token belongs to, so they survive token
+# refreshes and one user's keys never collide with another's.
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from jose import JWTError, jwt
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from config import settings
+from database import SessionLocal
+from models import IdempotencyKey
+from routers.auth import ALGORITHM
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# Cover letter generation can take a while; concurrent retries wait this long
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "60"))
+IDEMPOTENCY_POLL_SECONDS = 0.2
+MAX_KEY_LENGTH = 255
+MUTATING_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Hop-by-hop or per-response headers that must not be replayed
+_SKIP_HEADERS = {b"content-length", b"set-cookie", b"date", b"server"}
+
+
+def _fingerprint(method: str, path: str, query: bytes, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _normalized_body(content_type: str, body: bytes) -> bytes:
+    # Clients pick a fresh random multipart boundary on every retry; drop it so
+    # the same form fields and file still produce the same fingerprint
+    if content_type.startswith("multipart/form-data") and "boundary=" in content_type:
+        boundary = content_type.split("boundary=", 1)[1].split(";", 1)[0].strip().strip('"')
+        if boundary:
+            return body.replace(boundary.encode("latin-1"), b"")
+    return body
+
+
+def _token_owner(authorization: bytes):
+    """The "user:<id>" scope of a valid bearer token, else None."""
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        sub = jwt.decode(token.strip(), settings.SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+    return f"user:{sub}" if sub is not None else None
+
+
+def _claim(owner, key, method, path, fingerprint):
+    """Insert the key as in_progress. Returns None if we own it, else the existing row."""
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < now)\
+            .delete(synchronize_session=False)
+        db.add(IdempotencyKey(
+            scope=owner,
+            key=key,
+            method=method,
+            path=path,
+            fingerprint=fingerprint,
+            status="in_progress",
+            expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+        ))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+        existing = _load(db, owner, key)
+        return existing
+    finally:
+        db.close()
+
+
+def _load(db, owner, key):
+    row = db.query(IdempotencyKey).filter(
+        IdempotencyKey.scope == owner,
+        IdempotencyKey.key == key
+    ).first()
+    if row is None:
+        return None
+    db.expunge(row)
+    return row
+
+
+def _get(owner, key):
+    db = SessionLocal()
+    try:
+        return _load(db, owner, key)
+    finally:
+        db.close()
+
+
+def _complete(owner, key, status, headers, body):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == owner,
+            IdempotencyKey.key == key
+        ).update({
+            "status": "completed",
+            "response_status": status,
+            "response_headers": headers,
+            "response_body": body,
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(owner, key):
+    # Server errors are not cached, so the client can retry with the same key
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == owner,
+            IdempotencyKey.key == key
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _replay(row) -> Response:
+    headers = {name: value for name, value in (row.response_headers or [])}
+    headers["Idempotent-Replayed"] = "true"
+    return Response(content=row.response_body or b"", status_code=row.response_status, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware honouring the Idempotency-Key header on authenticated writes."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        key = headers.get(IDEMPOTENCY_HEADER.encode(), b"").decode("latin-1").strip()
+        # Requests without a valid token are rejected by the endpoint anyway
+        owner = _token_owner(headers.get(b"authorization", b"")) if key else None
+        if owner is None:
+            return await self.app(scope, receive, send)
+        if len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": "Idempotency-Key is too long"}, status_code=400)
+            return await response(scope, receive, send)
+
+        # Buffer the body so it can be fingerprinted and then replayed to the app
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+
+        method, path = scope["method"], scope["path"]
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        fingerprint = _fingerprint(
+            method, path, scope.get("query_string", b""), _normalized_body(content_type, body)
+        )
+
+        existing = await run_in_threadpool(_claim, owner, key, method, path, fingerprint)
+        if existing is not None:
+            response = await self._resolve_existing(existing, owner, key, fingerprint)
+            return await response(scope, receive, send)
+
+        body_replayed = False
+
+        async def replay_receive():
+            nonlocal body_replayed
+            if body_replayed:
+                return await receive()
+            body_replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        captured = {"status": 500, "headers": [], "body": []}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = [
+                    (k.decode("latin-1"), v.decode("latin-1"))
+                    for k, v in message.get("headers", [])
+                    if k.lower() not in _SKIP_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                captured["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except Exception:
+            await run_in_threadpool(_release, owner, key)
+            raise
+
+        if captured["status"] >= 500:
+            await run_in_threadpool(_release, owner, key)
+        else:
+            await run_in_threadpool(
+                _complete, owner, key, captured["status"], captured["headers"], b"".join(captured["body"])
+            )
+
+    async def _resolve_existing(self, row, owner, key, fingerprint) -> Response:
+        waited = 0.0
+        while True:
+            if row is None:
+                # The original attempt failed and released the key
+                return JSONResponse(
+                    {"detail": "The original request with this Idempotency-Key failed; retry it"},
+                    status_code=409,
+                )
+            if row.fingerprint != fingerprint:
+                return JSONResponse(
+                    {"detail": "Idempotency-Key was already used for a different request"},
+                    status_code=422,
+                )
+            if row.status == "completed":
+                return _replay(row)
+            if waited >= IDEMPOTENCY_WAIT_SECONDS:
+                return JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"},
+                )
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+            waited += IDEMPOTENCY_POLL_SECONDS
+            row = await run_in_threadpool(_get, owner, key)
@@ -1,7 +1,21 @@
 # init_db.py
 from database import engine, Base
 import models  # registers models on Base
+from search_index import ensure_search_schema
+from archive import ensure_archive_schema
+from companies import ensure_company_schema
+from auth import ensure_user_schema
+from resume_versions import ensure_resume_version_schema
+from resume_analysis import ensure_resume_analysis_schema
+from models import ensure_indexes
 
 if __name__ == "__main__":
     Base.metadata.create_all(bind=engine)
+    ensure_search_schema(engine)
+    ensure_archive_schema(engine)
+    ensure_company_schema(engine)
+    ensure_user_schema(engine)
+    ensure_resume_version_schema(engine)
+    ensure_resume_analysis_schema(engine)
+    ensure_indexes(engine)
     print("✅ Tables created")
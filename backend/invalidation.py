@@ -0,0 +1,318 @@
+# invalidation.py
+# Cross-worker cache invalidation.
+#
+# In-process caches (InvalidatingCache) subscribe to typed events: user,
+# resume, application and cover_letter, each carrying the entity id and its
+# owner's user id. Events are raised automatically: an ORM flush that inserts,
+# updates or deletes one of those models queues an event on the session, and
+# the queue is published when the transaction commits (dropped on rollback).
+# That covers the routers and the maintenance scripts alike.
+#
+# Publishing applies the event to this process's caches at once and broadcasts
+# it to every other process sharing the database:
+#   * Postgres: NOTIFY on the cache_invalidation channel, issued on the
+#     committing session's own connection just before COMMIT, so it is
+#     delivered only if the write is; each worker LISTENs on one dedicated
+#     connection (CACHE_BUS_URL if PgBouncer runs in transaction mode, since
+#     LISTEN needs a session-mode connection), which serve.py budgets for
+#   * SQLite: an append-only event file next to the database that every worker
+#     tails; it is replaced when it grows past CACHE_BUS_FILE_MAX_BYTES
+# A listener that loses its connection or the file clears every cache, so
+# missed events never leave stale entries behind and long TTLs stay safe.
+#
+#   python invalidation.py publish user 42      # e.g. after editing a user in SQL
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from models import User, Resume, Application, CoverLetter
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+CACHE_BUS_FILE_MAX_BYTES = int(os.getenv("CACHE_BUS_FILE_MAX_BYTES", str(1024 * 1024)))
+CACHE_BUS_POLL_SECONDS = float(os.getenv("CACHE_BUS_POLL_SECONDS", "0.2"))
+# Tells this process's own broadcasts apart from everyone else's
+ORIGIN = uuid.uuid4().hex[:12]
+
+MODEL_KINDS = {
+    User: "user",
+    Resume: "resume",
+    Application: "application",
+    CoverLetter: "cover_letter",
+}
+ALL = "*"
+
+
+class InvalidationBus:
+    def __init__(self):
+        self._subscribers = defaultdict(list)
+        self._caches = []
+        self._engine = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _get_engine(self):
+        if self._engine is None:
+            from database import engine
+            self._engine = engine
+        return self._engine
+
+    # Subscribers
+
+    def subscribe(self, kinds, callback):
+        for kind in kinds:
+            self._subscribers[kind].append(callback)
+
+    def register_cache(self, cache):
+        self._caches.append(cache)
+
+    def clear_all(self):
+        for cache in self._caches:
+            cache.clear()
+
+    def dispatch(self, kind: str, entity_id, user_id):
+        for callback in self._subscribers.get(kind, ()):
+            try:
+                callback(kind, entity_id, user_id)
+            except Exception:
+                logger.exception("Cache invalidation callback failed for %s %s", kind, entity_id)
+
+    def _receive(self, raw: str):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if message.get("o") != ORIGIN:
+            self.dispatch(message["k"], message.get("i"), message.get("u"))
+
+    # Publishing
+
+    @staticmethod
+    def _payloads(events) -> list:
+        return [json.dumps({"o": ORIGIN, "k": k, "i": i, "u": u}, separators=(",", ":"))
+                for k, i, u in events]
+
+    def notify_in(self, session, events):
+        """NOTIFY the other workers inside ``session``'s transaction (Postgres)."""
+        for payload in self._payloads(events):
+            session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    def publish(self, events, broadcast: bool = True):
+        """Apply events locally and, unless already notified, broadcast them to the other workers."""
+        events = list(events)
+        if not events:
+            return
+        for kind, entity_id, user_id in events:
+            self.dispatch(kind, entity_id, user_id)
+        if not broadcast:
+            return
+        payloads = self._payloads(events)
+        try:
+            if self._get_engine().dialect.name == "postgresql":
+                self._publish_postgres(payloads)
+            else:
+                self._publish_file(payloads)
+        except Exception:
+            # Other workers fall back on their TTLs for this write
+            logger.exception("Could not broadcast %d cache invalidation(s)", len(payloads))
+
+    def _publish_postgres(self, payloads):
+        with self._get_engine().connect() as conn:
+            for payload in payloads:
+                conn.execute(select(func.pg_notify(CHANNEL, payload)))
+            conn.commit()
+
+    def file_path(self) -> str:
+        configured = os.getenv("CACHE_BUS_FILE")
+        if configured:
+            return configured
+        database = self._get_engine().url.database
+        return f"{database}-invalidations" if database and database != ":memory:" else \
+            os.path.join("uploads", "cache-invalidations")
+
+    def _publish_file(self, payloads):
+        path = self.file_path()
+        data = "".join(p + "\n" for p in payloads).encode("utf-8")
+        # O_APPEND keeps concurrent small writes from interleaving
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        if size > CACHE_BUS_FILE_MAX_BYTES:
+            # Swap in an empty file; tailing workers notice the new inode
+            tmp = f"{path}.{ORIGIN}"
+            open(tmp, "wb").close()
+            os.replace(tmp, path)
+
+    # Listening
+
+    def start(self):
+        """Start the background listener (once per process)."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                target = self._listen_postgres if self._get_engine().dialect.name == "postgresql" \
+                    else self._listen_file
+                self._thread = threading.Thread(target=target, name="cache-invalidation", daemon=True)
+                self._thread.start()
+
+    def _listen_postgres(self):
+        import psycopg
+        url = os.getenv("CACHE_BUS_URL") or \
+            self._get_engine().url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                with psycopg.connect(url, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    # Anything published while we were disconnected is lost
+                    self.clear_all()
+                    for notify in conn.notifies():
+                        self._receive(notify.payload)
+            except Exception:
+                logger.exception("Cache invalidation listener disconnected; retrying")
+            time.sleep(1)
+
+    def _listen_file(self):
+        path = self.file_path()
+        inode, offset, pending = None, 0, b""
+        while True:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None:
+                if inode is None:
+                    inode, offset = stat.st_ino, stat.st_size  # only events from now on
+                elif stat.st_ino != inode or stat.st_size < offset:
+                    inode, offset, pending = stat.st_ino, 0, b""
+                    self.clear_all()
+                if stat.st_size > offset:
+                    with open(path, "rb") as fh:
+                        fh.seek(offset)
+                        chunk = fh.read(stat.st_size - offset)
+                    offset += len(chunk)
+                    *lines, pending = (pending + chunk).split(b"\n")
+                    for line in lines:
+                        self._receive(line.decode("utf-8", "replace"))
+            time.sleep(CACHE_BUS_POLL_SECONDS)
+
+
+bus = InvalidationBus()
+
+
+class InvalidatingCache:
+    """Thread-safe TTL cache dropped by bus events.
+
+    ``key`` says which event field the cache is keyed on: "id" for per-entity
+    caches, "user_id" for per-user caches such as list or summary responses.
+    """
+
+    def __init__(self, name: str, kinds, ttl: float, maxsize: int = 10000, key: str = "id"):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.key = key
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        bus.subscribe(kinds, self._on_event)
+        bus.register_cache(self)
+
+    def get(self, key):
+        bus.start()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._data.pop(next(iter(self._data)))  # oldest insertion
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _on_event(self, kind, entity_id, user_id):
+        target = entity_id if self.key == "id" else user_id
+        if target is None or target == ALL:
+            self.clear()
+        else:
+            self.invalidate(target)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+# ORM writes become events, published only once their transaction commits
+@event.listens_for(Session, "after_flush")
+def _queue_invalidations(session, flush_context):
+    queued = session.info.setdefault("invalidations", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        kind = MODEL_KINDS.get(type(obj))
+        if kind is not None and obj.id is not None:
+            queued.add((kind, obj.id, obj.id if kind == "user" else obj.user_id))
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_invalidations(session):
+    # On Postgres the NOTIFY rides on the committing connection: it is sent only
+    # if the write commits, and needs no second pooled connection
+    if session.in_nested_transaction():
+        return
+    session.flush()  # commit's own final flush would come after this hook
+    queued = session.info.get("invalidations")
+    if queued and session.get_bind().dialect.name == "postgresql":
+        bus.notify_in(session, queued)
+        session.info["invalidations_notified"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_invalidations(session):
+    if session.in_nested_transaction():
+        return  # a released savepoint; wait for the real commit
+    notified = session.info.pop("invalidations_notified", False)
+    bus.publish(session.info.pop("invalidations", ()), broadcast=not notified)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session):
+    if session.in_nested_transaction():
+        return  # keep what the enclosing transaction queued; extra invalidations are harmless
+    session.info.pop("invalidations", None)
+    session.info.pop("invalidations_notified", None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish a cache invalidation to every worker")
+    parser.add_argument("command", choices=["publish"])
+    parser.add_argument("kind", choices=sorted(set(MODEL_KINDS.values())))
+    parser.add_argument("id", help=f"entity id, or {ALL} for every cached {{kind}}")
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args()
+
+    entity_id = ALL if args.id == ALL else int(args.id)
+    bus.publish([(args.kind, entity_id, args.user_id if args.user_id is not None else
+                  (entity_id if args.kind == "user" else ALL))])
+    print(f"✅ Published {args.kind} {args.id}")
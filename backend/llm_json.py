@@ -0,0 +1,255 @@
+# llm_json.py
+# Structured (JSON) model outputs.
+#
+# Requests go out with function calling, so the model fills a JSON schema rather
+# than writing free-form text. Whatever comes back is parsed locally first and
+# repaired if needed (markdown fences, prose around the object, a reply cut off
+# mid-array); the model is asked again only when local repair fails. Outcome
+# counters per task are kept for the admin stats endpoint.
+import itertools
+import json
+import logging
+import re
+import threading
+from collections import defaultdict
+from fastapi import HTTPException
+from model_router import create_completion
+
+logger = logging.getLogger(__name__)
+
+MAX_MODEL_ATTEMPTS = 2
+
+RESUME_FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "missing_sections": {"type": "array", "items": {"type": "string"}},
+        "formatting_issues": {"type": "array", "items": {"type": "string"}},
+        "content_suggestions": {"type": "array", "items": {"type": "string"}},
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "weaknesses": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["missing_sections", "formatting_issues", "content_suggestions", "strengths", "weaknesses"],
+}
+
+# Feedback on one resume section; missing sections are found by the parser instead
+RESUME_SECTION_FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        key: RESUME_FEEDBACK_SCHEMA["properties"][key]
+        for key in ("formatting_issues", "content_suggestions", "strengths", "weaknesses")
+    },
+    "required": ["formatting_issues", "content_suggestions", "strengths", "weaknesses"],
+}
+
+
+def resume_sections_schema(names) -> dict:
+    """One RESUME_SECTION_FEEDBACK_SCHEMA object per named section."""
+    names = list(names)
+    return {
+        "type": "object",
+        "properties": {name: RESUME_SECTION_FEEDBACK_SCHEMA for name in names},
+        "required": names,
+    }
+
+
+JOB_MATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "match_score": {"type": "integer", "minimum": 0, "maximum": 100,
+                        "description": "percentage match between resume and job"},
+        "missing_skills": {"type": "array", "items": {"type": "string"}},
+        "matching_skills": {"type": "array", "items": {"type": "string"}},
+        "suggestions": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["match_score", "missing_skills", "matching_skills", "suggestions"],
+}
+
+
+class StructuredOutputError(ValueError):
+    pass
+
+
+# task -> outcome -> count; outcomes: parsed, repaired, retried, failed
+_stats = defaultdict(lambda: defaultdict(int))
+_stats_lock = threading.Lock()
+
+
+def _record(task: str, outcome: str):
+    with _stats_lock:
+        _stats[task][outcome] += 1
+
+
+def structured_output_stats() -> dict:
+    with _stats_lock:
+        report = {}
+        for task, counts in _stats.items():
+            calls = counts["parsed"] + counts["repaired"] + counts["failed"]
+            report[task] = {
+                **counts,
+                "calls": calls,
+                "repair_rate": round(counts["repaired"] / calls, 4) if calls else 0.0,
+                "failure_rate": round(counts["failed"] / calls, 4) if calls else 0.0,
+            }
+        return report
+
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+def _scan(text: str):
+    """Closing brackets needed for ``text``, and whether it ends inside a string."""
+    stack = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+        elif ch in "]}" and stack:
+            stack.pop()
+    return "".join(reversed(stack)), in_string
+
+
+def _truncation_candidates(text: str, max_cuts: int = 50):
+    """Ways to close a JSON document that was cut off, longest first."""
+    closing, in_string = _scan(text)
+    if in_string:
+        yield text + '"' + _scan(text + '"')[0]
+    else:
+        yield text + closing
+    # Otherwise drop the incomplete trailing element: cut back to a ',' or an
+    # opening bracket and close whatever is still open at that point
+    cuts = [i for i, ch in enumerate(text) if ch in ",[{"][-max_cuts:]
+    for i in reversed(cuts):
+        prefix = text[:i] if text[i] == "," else text[:i + 1]
+        closing, in_string = _scan(prefix)
+        if not in_string:
+            yield prefix + closing
+
+
+def repair_json(raw: str):
+    """Parse model output as JSON, fixing the usual ways it goes wrong.
+
+    Returns (value, repaired). Raises StructuredOutputError if nothing works.
+    """
+    if raw is None:
+        raise StructuredOutputError("empty response")
+    text = raw.strip()
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        raise StructuredOutputError("no JSON object in response")
+    text = text[start:]
+
+    candidates = [text]
+    end = max(text.rfind("}"), text.rfind("]"))
+    if end != -1:
+        candidates.append(text[:end + 1])  # trailing prose after the object
+    for candidate in itertools.chain(candidates, _truncation_candidates(text)):
+        # Trailing commas are the other common slip
+        candidate = re.sub(r",\s*([\]}])", r"\1", candidate)
+        try:
+            return json.loads(candidate), True
+        except ValueError:
+            continue
+    raise StructuredOutputError("could not repair JSON response")
+
+
+def _coerce(value, schema: dict):
+    kind = schema.get("type")
+    if kind == "object":
+        value = value if isinstance(value, dict) else {}
+        props = schema.get("properties", {})
+        out = {key: _coerce(value.get(key), sub) for key, sub in props.items()}
+        out.update({k: v for k, v in value.items() if k not in props})
+        return out
+    if kind == "array":
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            value = [value]
+        return [_coerce(v, schema.get("items", {})) for v in value]
+    if kind == "integer":
+        if isinstance(value, str):
+            digits = re.search(r"-?\d+(?:\.\d+)?", value)
+            value = float(digits.group(0)) if digits else None
+        if isinstance(value, (int, float)):
+            value = int(round(value))
+            if "maximum" in schema:
+                value = min(value, schema["maximum"])
+            if "minimum" in schema:
+                value = max(value, schema["minimum"])
+            return value
+        return None
+    if kind == "string":
+        return value if isinstance(value, str) else ("" if value is None else str(value))
+    return value
+
+
+def conform(value, schema: dict) -> dict:
+    """Fill missing required fields with empty values and fix scalar types."""
+    if not isinstance(value, dict):
+        raise StructuredOutputError("response is not a JSON object")
+    return _coerce(value, schema)
+
+
+def structured_request(task: str, prompt: str, schema: dict) -> dict:
+    """messages/tools/tool_choice asking for ``schema`` through a forced function call."""
+    name = f"submit_{task}"
+    return {
+        "messages": [{"role": "user", "content": prompt}],
+        "tools": [{
+            "type": "function",
+            "function": {"name": name, "description": f"Return the {task} result", "parameters": schema},
+        }],
+        "tool_choice": {"type": "function", "function": {"name": name}},
+    }
+
+
+def parse_structured(task: str, raw: str, schema: dict) -> dict:
+    """Repair and conform one model reply; raises StructuredOutputError."""
+    value, repaired = repair_json(raw)
+    result = conform(value, schema)
+    _record(task, "repaired" if repaired else "parsed")
+    return result
+
+
+def _raw_arguments(response) -> str:
+    message = response.choices[0].message
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return tool_calls[0].function.arguments
+    return message.content
+
+
+async def structured_completion(client, task: str, prompt: str, schema: dict, user_id: int = None) -> dict:
+    """Call the task's routed model for a JSON object matching ``schema``."""
+    request = structured_request(task, prompt, schema)
+    last_error = None
+    for attempt in range(MAX_MODEL_ATTEMPTS):
+        if attempt:
+            _record(task, "retried")
+        response = await create_completion(client, task, user_id, **request)
+        try:
+            return parse_structured(task, _raw_arguments(response), schema)
+        except StructuredOutputError as exc:
+            last_error = exc
+            logger.warning("Unparseable %s output (attempt %d): %s", task, attempt + 1, exc)
+
+    _record(task, "failed")
+    raise HTTPException(status_code=502, detail=f"The AI service returned an invalid {task} response: {last_error}")
@@ -0,0 +1,244 @@
+# llm_usage.py
+# Write-behind ledger of model calls: who called which task/model, tokens,
+# latency, cache hits, outcome and estimated cost.
+#
+# model_router.create_completion records every attempt (fallbacks included)
+# into an in-memory buffer. A background thread writes the buffer to llm_usage
+# in one batch every LLM_USAGE_FLUSH_SECONDS, or sooner once
+# LLM_USAGE_BATCH_SIZE rows are waiting, so request handlers never commit for
+# it. Rows still buffered when a worker dies are lost; the buffer is bounded so
+# a database outage can't grow it without limit.
+#
+# Prices are USD per 1M tokens (input, cached input, output) and can be
+# overridden with the LLM_PRICES setting, e.g.
+#
+#   LLM_PRICES='{"gpt-4o-mini": [0.15, 0.075, 0.6]}'
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+LLM_USAGE_BATCH_SIZE = int(os.getenv("LLM_USAGE_BATCH_SIZE", "200"))
+LLM_USAGE_FLUSH_SECONDS = float(os.getenv("LLM_USAGE_FLUSH_SECONDS", "5"))
+LLM_USAGE_MAX_BUFFER = int(os.getenv("LLM_USAGE_MAX_BUFFER", "20000"))
+
+DEFAULT_PRICES = {
+    "gpt-3.5-turbo": (0.5, 0.5, 1.5),
+    "gpt-4o-mini": (0.15, 0.075, 0.6),
+    "gpt-4o": (2.5, 1.25, 10.0),
+}
+
+
+def load_prices(raw: str = None) -> dict:
+    prices = dict(DEFAULT_PRICES)
+    raw = settings.LLM_PRICES if raw is None else raw
+    if raw:
+        try:
+            prices.update({model: tuple(p) for model, p in json.loads(raw).items()})
+        except (ValueError, TypeError):
+            logger.error("LLM_PRICES is not valid JSON; using default prices")
+    return prices
+
+
+PRICES = load_prices()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    # Dated snapshots ("gpt-4o-mini-2024-07-18") are priced like their family
+    family = next((m for m in sorted(PRICES, key=len, reverse=True) if model.startswith(m)), None)
+    if family is None:
+        return 0.0
+    input_price, cached_price, output_price = PRICES[family]
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * input_price + cached_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+
+def usage_fields(response) -> dict:
+    """Token counts from a chat completion's ``usage`` block (absent on errors)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+    }
+
+
+class UsageLedger:
+    """Buffers usage rows and writes them in batches from a background thread."""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._buffer = deque(maxlen=LLM_USAGE_MAX_BUFFER)
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.dropped = 0
+
+    def record(self, task: str, model: str, outcome: str, latency: float, user_id: int = None,
+               prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0,
+               cache_hit: bool = None, cost_usd: float = None):
+        row = {
+            "created_at": datetime.utcnow(),
+            "user_id": user_id,
+            "task": task,
+            "model": model,
+            "outcome": outcome,
+            "latency_ms": int(latency * 1000),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cache_hit": bool(cached_tokens) if cache_hit is None else cache_hit,
+            "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+            if cost_usd is None else cost_usd,
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        self._ensure_thread()
+        if pending >= LLM_USAGE_BATCH_SIZE:
+            self._wake.set()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="llm-usage-ledger", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop:
+            self._wake.wait(LLM_USAGE_FLUSH_SECONDS)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+            if not rows:
+                return 0
+            from models import LLMUsage
+            if self._session_factory is None:
+                from database import SessionLocal
+                self._session_factory = SessionLocal
+            db = self._session_factory()
+            try:
+                db.bulk_insert_mappings(LLMUsage, rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Could not write %d LLM usage rows; dropping them", len(rows))
+                self.dropped += len(rows)
+                return 0
+            finally:
+                db.close()
+            return len(rows)
+
+    def close(self):
+        self._stop = True
+        self._wake.set()
+        self.flush()
+
+
+usage_ledger = UsageLedger()
+atexit.register(usage_ledger.close)
+
+
+def _percentile_sql(column: str, group: str, quantile: float) -> str:
+    # Nearest-rank percentile with window functions, so SQLite and Postgres
+    # share one query (SQLite has no percentile_cont)
+    return f"""
+        SELECT {group}, MIN({column}) AS value FROM (
+            SELECT {group}, {column},
+                   ROW_NUMBER() OVER (PARTITION BY {group} ORDER BY {column}) AS rn,
+                   COUNT(*) OVER (PARTITION BY {group}) AS n
+            FROM llm_usage WHERE created_at >= :since
+        ) ranked
+        WHERE rn >= {quantile} * n
+        GROUP BY {group}
+    """
+
+
+def task_rollup(db: Session, since: datetime) -> list:
+    """Calls, tokens, cost, error rate and p50/p95 latency per task and model."""
+    totals = db.execute(text("""
+        SELECT task, model,
+               COUNT(*) AS calls,
+               SUM(CASE WHEN outcome IN ('error', 'timeout') THEN 1 ELSE 0 END) AS failures,
+               SUM(CASE WHEN cache_hit THEN 1 ELSE 0 END) AS cache_hits,
+               SUM(prompt_tokens) AS prompt_tokens,
+               SUM(completion_tokens) AS completion_tokens,
+               SUM(cost_usd) AS cost_usd
+        FROM llm_usage WHERE created_at >= :since
+        GROUP BY task, model
+        ORDER BY task, calls DESC
+    """), {"since": since}).all()
+    p50 = dict(db.execute(text(_percentile_sql("latency_ms", "task", 0.5)), {"since": since}).all())
+    p95 = dict(db.execute(text(_percentile_sql("latency_ms", "task", 0.95)), {"since": since}).all())
+
+    tasks = {}
+    for row in totals:
+        entry = tasks.setdefault(row.task, {
+            "task": row.task, "calls": 0, "failures": 0, "cache_hits": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+            "p50_latency_ms": p50.get(row.task), "p95_latency_ms": p95.get(row.task),
+            "models": [],
+        })
+        for key in ("calls", "failures", "cache_hits", "prompt_tokens", "completion_tokens"):
+            entry[key] += int(getattr(row, key) or 0)
+        entry["cost_usd"] += float(row.cost_usd or 0)
+        entry["models"].append({"model": row.model, "calls": row.calls, "cost_usd": round(float(row.cost_usd or 0), 4)})
+    for entry in tasks.values():
+        entry["cost_usd"] = round(entry["cost_usd"], 4)
+        entry["failure_rate"] = round(entry["failures"] / entry["calls"], 4) if entry["calls"] else 0.0
+    return list(tasks.values())
+
+
+def top_users(db: Session, since: datetime, limit: int = 20, order_by: str = "cost") -> list:
+    """Heaviest users by estimated cost, tokens or call count."""
+    order = {"cost": "cost_usd", "tokens": "tokens", "calls": "calls", "latency": "total_latency_ms"}[order_by]
+    rows = db.execute(text(f"""
+        SELECT u.user_id, users.email, u.calls, u.tokens, u.cost_usd, u.total_latency_ms
+        FROM (
+            SELECT user_id,
+                   COUNT(*) AS calls,
+                   SUM(prompt_tokens + completion_tokens) AS tokens,
+                   SUM(cost_usd) AS cost_usd,
+                   SUM(latency_ms) AS total_latency_ms
+            FROM llm_usage
+            WHERE created_at >= :since AND user_id IS NOT NULL
+            GROUP BY user_id
+            ORDER BY {order} DESC
+            LIMIT :limit
+        ) u
+        JOIN users ON users.id = u.user_id
+        ORDER BY u.{order} DESC
+    """), {"since": since, "limit": limit}).all()
+    return [
+        {
+            "user_id": row.user_id,
+            "email": row.email,
+            "calls": row.calls,
+            "tokens": int(row.tokens or 0),
+            "cost_usd": round(float(row.cost_usd or 0), 4),
+            "total_latency_ms": int(row.total_latency_ms or 0),
+        }
+        for row in rows
+    ]
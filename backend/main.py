@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from typing import Optional
@@ -7,8 +7,18 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from models import User, Resume, CoverLetter, Application
-from routers import auth, resumes, cover_letters, applications, admin
-from database import engine, Base
+from routers import auth, resumes, cover_letters, applications, admin, search, dashboard, analytics
+from database import (engine, Base, record_write, replicas, READ_PRIMARY_COOKIE, READ_PRIMARY_HEADER,
+                      READ_YOUR_WRITES_SECONDS)
+from search_index import ensure_search_schema
+from archive import ensure_archive_schema
+from companies import ensure_company_schema
+from auth import ensure_user_schema
+from resume_versions import ensure_resume_version_schema
+from resume_analysis import ensure_resume_analysis_schema
+from models import ensure_indexes
+from idempotency import IdempotencyMiddleware
+from profiling import ProfilingMiddleware
 from config import settings
 from contextlib import asynccontextmanager
 
@@ -26,17 +36,32 @@ app = FastAPI(
 async def lifespan(app: FastAPI):
     # Startup logic
     Base.metadata.create_all(bind=engine)
+    ensure_search_schema(engine)
+    ensure_archive_schema(engine)
+    ensure_company_schema(engine)
+    ensure_user_schema(engine)
+    ensure_resume_version_schema(engine)
+    ensure_resume_analysis_schema(engine)
+    ensure_indexes(engine)
     yield
     # Shutdown logic (optional)
 
 
-# Configure CORS
+# Replay stored responses for retried writes carrying an Idempotency-Key
+app.add_middleware(IdempotencyMiddleware)
+
+# cProfile single requests that carry an admin-issued X-Profile token
+app.add_middleware(ProfilingMiddleware)
+
+# Configure CORS (added last so it wraps everything else)
 app.add_middleware(
     CORSMiddleware,
     allow_origins = ["https://www.applixr.com", "https://applixr-frontend.vercel.app","https://applixr-frontend-git-main-olamides-projects-b08584a5.vercel.app","https://applixr-frontend-mj3gidbw0-olamides-projects-b08584a5.vercel.app"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The frontend reads the read-your-writes pin from this header (see database.py)
+    expose_headers=[READ_PRIMARY_HEADER],
 )
 
 # Include routers
@@ -45,6 +70,27 @@ app.include_router(resumes.router)
 app.include_router(cover_letters.router)
 app.include_router(applications.router)
 app.include_router(admin.router)
+app.include_router(search.router)
+app.include_router(dashboard.router)
+app.include_router(analytics.router)
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # Successful writes pin the client's following reads to the primary
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        token = record_write()
+        response.headers[READ_PRIMARY_HEADER] = token
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            token,
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+            samesite="none",
+            secure=True,
+        )
+    return response
 
 
 @app.get("/")
@@ -53,6 +99,8 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    if replicas.engines:
+        return {"status": "healthy", "replicas": replicas.status()}
     return {"status": "healthy"}
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+# model_router.py
+# Per-task model selection with latency-aware fallback.
+#
+# Each AI task (resume analysis, job match, cover letter) has a route: primary
+# model, fallback model, temperature, max_tokens and a latency SLO. Routes come
+# from DEFAULT_ROUTES overlaid with the MODEL_ROUTES setting (JSON), e.g.
+#
+#   MODEL_ROUTES='{"job_match": {"model": "gpt-4o-mini", "latency_slo": 8},
+#                  "cover_letter": {"model": "gpt-4o", "fallback": "gpt-4o-mini"}}'
+#
+# A primary call that errors or runs past the SLO is retried on the fallback.
+# A primary that keeps missing its SLO is skipped for a cooldown period, so
+# requests don't each pay the timeout before falling back.
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from openai import APIError
+from config import settings
+from llm_usage import usage_ledger, usage_fields
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTES = {
+    "resume_analysis": {"model": "gpt-3.5-turbo", "fallback": "gpt-4o-mini",
+                        "temperature": 0.7, "max_tokens": 1000, "latency_slo": 20},
+    "job_match": {"model": "gpt-3.5-turbo", "fallback": "gpt-4o-mini",
+                  "temperature": 0.7, "max_tokens": 800, "latency_slo": 20},
+    "cover_letter": {"model": "gpt-3.5-turbo", "fallback": "gpt-4o-mini",
+                     "temperature": 0.7, "max_tokens": 1200, "latency_slo": 30},
+}
+# Consecutive failures (errors or SLO misses) before a primary is skipped
+FAILURE_THRESHOLD = 3
+COOLDOWN_SECONDS = 60
+LATENCY_WINDOW = 200
+
+
+def load_routes(raw: str = None) -> dict:
+    routes = {task: dict(route) for task, route in DEFAULT_ROUTES.items()}
+    raw = settings.MODEL_ROUTES if raw is None else raw
+    if raw:
+        try:
+            overrides = json.loads(raw)
+        except ValueError:
+            logger.error("MODEL_ROUTES is not valid JSON; using default routes")
+            overrides = {}
+        for task, route in overrides.items():
+            routes.setdefault(task, {}).update(route)
+    return routes
+
+
+ROUTES = load_routes()
+
+
+class ModelHealth:
+    """Observed latency per model, and a short circuit breaker for primaries."""
+
+    def __init__(self):
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._counts = defaultdict(lambda: defaultdict(int))
+        self._failures = defaultdict(int)
+        self._skip_until = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float, outcome: str):
+        with self._lock:
+            self._latencies[model].append(seconds)
+            self._counts[model][outcome] += 1
+            if outcome == "ok":
+                self._failures[model] = 0
+            else:
+                self._failures[model] += 1
+                if self._failures[model] >= FAILURE_THRESHOLD:
+                    self._skip_until[model] = time.monotonic() + COOLDOWN_SECONDS
+                    self._failures[model] = 0
+
+    def available(self, model: str) -> bool:
+        return time.monotonic() >= self._skip_until.get(model, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            report = {}
+            for model, samples in self._latencies.items():
+                ordered = sorted(samples)
+                report[model] = {
+                    **self._counts[model],
+                    "samples": len(ordered),
+                    "p50_seconds": round(ordered[len(ordered) // 2], 3) if ordered else None,
+                    "p95_seconds": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3) if ordered else None,
+                    "skipped_until_cooldown": not self.available(model),
+                }
+            return report
+
+
+model_health = ModelHealth()
+
+
+def route_for(task: str) -> dict:
+    return ROUTES.get(task) or ROUTES["cover_letter"]
+
+
+def _params(route: dict, model: str) -> dict:
+    params = {"model": model}
+    for key in ("temperature", "max_tokens"):
+        if route.get(key) is not None:
+            params[key] = route[key]
+    return params
+
+
+def request_params(task: str) -> dict:
+    """model/temperature/max_tokens for a request built outside create_completion (batches)."""
+    route = route_for(task)
+    return _params(route, route["model"])
+
+
+async def create_completion(client, task: str, user_id: int = None, **kwargs):
+    """chat.completions.create for ``task``, with the route's model and fallback.
+
+    ``kwargs`` (messages, tools, ...) are passed through; model, temperature and
+    max_tokens come from the route. Every attempt is recorded in the usage
+    ledger against ``user_id``.
+    """
+    route = route_for(task)
+    primary, fallback = route["model"], route.get("fallback")
+    slo = route.get("latency_slo")
+
+    candidates = [primary]
+    if fallback and fallback != primary:
+        if model_health.available(primary):
+            candidates.append(fallback)
+        else:
+            candidates = [fallback]
+
+    last_error = None
+    for i, model in enumerate(candidates):
+        is_last = i == len(candidates) - 1
+        started = time.monotonic()
+        try:
+            call = client.chat.completions.create(**_params(route, model), **kwargs)
+            # Only the primary is cut off at the SLO; the last resort gets all the time it needs
+            response = await (call if is_last or not slo else asyncio.wait_for(call, timeout=slo))
+        except asyncio.TimeoutError as exc:
+            model_health.record(model, time.monotonic() - started, "timeout")
+            usage_ledger.record(task, model, "timeout", time.monotonic() - started, user_id)
+            logger.warning("%s: %s exceeded %ss SLO, falling back", task, model, slo)
+            last_error = exc
+            continue
+        except APIError as exc:
+            model_health.record(model, time.monotonic() - started, "error")
+            usage_ledger.record(task, model, "error", time.monotonic() - started, user_id)
+            logger.warning("%s: %s failed (%s)%s", task, model, exc, "" if is_last else ", falling back")
+            last_error = exc
+            if is_last:
+                raise
+            continue
+        elapsed = time.monotonic() - started
+        outcome = "ok" if not slo or elapsed <= slo else "slow"
+        model_health.record(model, elapsed, outcome)
+        usage_ledger.record(task, model, outcome, elapsed, user_id, **usage_fields(response))
+        return response
+    raise last_error
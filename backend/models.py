@@ -1,7 +1,7 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, JSON, Text, Enum
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Index, Integer, String, DateTime, JSON, Text, Enum, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, false
 from datetime import datetime
 from passlib.context import CryptContext
 import enum
@@ -25,6 +25,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     full_name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)  # Store hashed password
+    is_admin = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -43,31 +44,65 @@ class User(Base):
 
 class Resume(Base):
     __tablename__ = "resumes"
+    __table_args__ = (
+        # Also created on older databases by resume_versions.ensure_resume_version_schema
+        UniqueConstraint("document_id", "version", name="uq_resumes_document_version"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # Revisions of one resume share a document; NULL for resumes uploaded before versioning
+    document_id = Column(Integer, ForeignKey("resume_documents.id"), nullable=True, index=True)
+    version = Column(Integer, nullable=True)
     file_path = Column(String, nullable=False)
     file_name = Column(String, nullable=False)
     parsed_data = Column(JSON)
     ai_feedback = Column(JSON)
+    # resume_analysis.RESUME_ANALYSIS_PROMPT_VERSION that produced ai_feedback; older is stale
+    analysis_version = Column(Integer, nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     user = relationship("User", back_populates="resumes")
+    document = relationship("ResumeDocument", back_populates="versions")
     cover_letters = relationship("CoverLetter", back_populates="resume")
     applications = relationship("Application", back_populates="resume")
 
+class ResumeDocument(Base):
+    """A resume and all of its uploaded revisions (see resume_versions.py)."""
+    __tablename__ = "resume_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    title = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    versions = relationship("Resume", back_populates="document", order_by="Resume.version")
+
+class ResumeText(Base):
+    """Extracted resume text: whole for a base version, a line delta against it otherwise."""
+    __tablename__ = "resume_texts"
+
+    resume_id = Column(Integer, ForeignKey("resumes.id"), primary_key=True)
+    # NULL when payload holds the full text
+    base_resume_id = Column(Integer, ForeignKey("resumes.id"), nullable=True, index=True)
+    text_hash = Column(String(64), nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed text or JSON delta
+
 class CoverLetter(Base):
     __tablename__ = "cover_letters"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     resume_id = Column(Integer, ForeignKey("resumes.id"))
     job_description = Column(Text, nullable=False)
     content = Column(Text, nullable=False)
     tone = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set when content/job_description were moved to archived_cover_letter_bodies
+    archived_at = Column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", back_populates="cover_letters")
     resume = relationship("Resume", back_populates="cover_letters")
@@ -78,6 +113,8 @@ class Company(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
+    # companies.normalize_name(name); what applications are matched on
+    normalized_name = Column(String, unique=True, index=True, nullable=True)
     website = Column(String, nullable=True)
     industry = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -87,12 +124,19 @@ class Company(Base):
 
 class Application(Base):
     __tablename__ = "applications"
+    # Per-user lookups behind the dashboard summary and list views
+    __table_args__ = (
+        Index("ix_applications_user_status", "user_id", "status"),
+        Index("ix_applications_user_created", "user_id", "created_at"),
+        Index("ix_applications_user_deadline", "user_id", "application_deadline"),
+        Index("ix_applications_user_company", "user_id", "company_name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     resume_id = Column(Integer, ForeignKey("resumes.id"))
     cover_letter_id = Column(Integer, ForeignKey("cover_letters.id"), nullable=True)
-    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True)
     company_name = Column(String, nullable=False)
     position = Column(String, nullable=False)
     job_url = Column(String, nullable=True)
@@ -105,4 +149,122 @@ class Application(Base):
     user = relationship("User", back_populates="applications")
     resume = relationship("Resume", back_populates="applications")
     cover_letter = relationship("CoverLetter", back_populates="applications")
-    company = relationship("Company", back_populates="applications") 
\ No newline at end of file
+    company = relationship("Company", back_populates="applications")
+
+class ApplicationStatusChange(Base):
+    """Append-only log of application status transitions (see status_history.py)."""
+    __tablename__ = "application_status_changes"
+    __table_args__ = (
+        Index("ix_status_changes_application", "application_id", "changed_at"),
+        Index("ix_status_changes_user_changed", "user_id", "changed_at"),
+        Index("ix_status_changes_changed", "changed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # No foreign key: applications may be partitioned (composite primary key)
+    # or moved to archived_applications, and their history has to survive both
+    application_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    from_status = Column(String, nullable=True)  # NULL for the initial status
+    to_status = Column(String, nullable=False)
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class LLMUsage(Base):
+    """One model call (including fallback attempts); written in batches by llm_usage.py."""
+    __tablename__ = "llm_usage"
+    __table_args__ = (
+        Index("ix_llm_usage_created", "created_at"),
+        Index("ix_llm_usage_user_created", "user_id", "created_at"),
+        Index("ix_llm_usage_task_created", "task", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    task = Column(String(64), nullable=False)  # model_router task, one per AI endpoint
+    model = Column(String(64), nullable=False)
+    outcome = Column(String(16), nullable=False)  # ok, slow, timeout, error
+    latency_ms = Column(Integer, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    # Answered (wholly or partly) from a cache: provider prompt cache or our own
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+
+class ReanalysisJob(Base):
+    """Batch API re-analysis of stale resumes; driven step by step by resume_analysis.py."""
+    __tablename__ = "reanalysis_jobs"
+
+    id = Column(Integer, primary_key=True)
+    # preparing, submitting, in_progress, applying, completed, failed
+    status = Column(String(16), nullable=False, default="preparing")
+    prompt_version = Column(Integer, nullable=False)
+    model = Column(String(64), nullable=False)
+    max_resumes = Column(Integer, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    input_path = Column(String, nullable=True)
+    input_file_id = Column(String(64), nullable=True)
+    batch_id = Column(String(64), nullable=True)
+    batch_status = Column(String(32), nullable=True)  # as reported by the Batch API
+    output_file_id = Column(String(64), nullable=True)
+    error_file_id = Column(String(64), nullable=True)  # per-request failures, if any
+    total = Column(Integer, nullable=False, default=0)
+    completed_requests = Column(Integer, nullable=False, default=0)
+    failed_requests = Column(Integer, nullable=False, default=0)
+    # Output lines written back so far; applying resumes after this many
+    applied_lines = Column(Integer, nullable=False, default=0)
+    updated_resumes = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    lease_owner = Column(String(64), nullable=True)
+    lease_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "user:<id>" of the caller, so keys are only unique per user
+    scope = Column(String(64), nullable=False)
+    key = Column(String(255), nullable=False)
+    method = Column(String(10), nullable=False)
+    path = Column(String, nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False, default="in_progress")
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSON, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class ArchivedApplication(Base):
+    """Closed application moved out of the hot table; the full row is in payload."""
+    __tablename__ = "archived_applications"
+
+    id = Column(Integer, primary_key=True)  # original applications.id
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    company_name = Column(String, nullable=False)
+    position = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON
+
+class ArchivedCoverLetterBody(Base):
+    __tablename__ = "archived_cover_letter_bodies"
+
+    cover_letter_id = Column(Integer, ForeignKey("cover_letters.id"), primary_key=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON
+
+
+def ensure_indexes(engine):
+    """Create indexes declared on the models that older databases don't have yet."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
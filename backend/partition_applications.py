@@ -0,0 +1,127 @@
+# partition_applications.py
+# Postgres only: convert `applications` into a table range-partitioned by month
+# on created_at, and keep future partitions created ahead of time.
+#
+#   python partition_applications.py convert   # one-off, takes an exclusive lock
+#   python partition_applications.py ensure    # run monthly (cron) to pre-create partitions
+#
+# Partition pruning keeps "recent applications" queries and the archive job's
+# range scans on a few small partitions, and old months can be detached cheaply.
+import argparse
+from datetime import date
+from sqlalchemy import text
+from companies import ensure_company_schema
+from database import engine
+from models import ensure_indexes
+from search_index import ensure_search_schema
+
+MONTHS_AHEAD = 3
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def is_partitioned(conn) -> bool:
+    kind = conn.execute(text(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = 'applications' AND n.nspname = current_schema()"
+    )).scalar()
+    return kind == "p"
+
+
+def create_partition(conn, month: date):
+    name = f"applications_{month.year}_{month.month:02d}"
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF applications "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    ))
+
+
+def ensure_partitions(conn, months_ahead: int = MONTHS_AHEAD):
+    current = _month_start(date.today())
+    for offset in range(months_ahead + 1):
+        create_partition(conn, _add_months(current, offset))
+
+
+def convert(keep_old: bool = False):
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Partitioning is only supported on Postgres")
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            print("applications is already partitioned")
+            ensure_partitions(conn)
+            return
+
+        conn.execute(text("LOCK TABLE applications IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text("UPDATE applications SET created_at = now() WHERE created_at IS NULL"))
+        first = conn.execute(text("SELECT min(created_at) FROM applications")).scalar()
+
+        conn.execute(text("ALTER TABLE applications RENAME TO applications_unpartitioned"))
+        # Index names are schema-wide; free every one of them for the new table
+        for (name,) in conn.execute(text(
+            "SELECT indexname FROM pg_indexes "
+            "WHERE tablename = 'applications_unpartitioned' AND schemaname = current_schema()"
+        )).all():
+            if "applications" in name:
+                renamed = name.replace("applications", "applications_unpartitioned", 1)[:63]
+                conn.execute(text(f'ALTER INDEX "{name}" RENAME TO "{renamed}"'))
+
+        # The partition key must be part of the primary key
+        conn.execute(text(
+            "CREATE TABLE applications (LIKE applications_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (created_at)"
+        ))
+        conn.execute(text("ALTER TABLE applications ALTER COLUMN created_at SET NOT NULL"))
+        conn.execute(text("ALTER TABLE applications ADD PRIMARY KEY (id, created_at)"))
+        conn.execute(text("ALTER SEQUENCE IF EXISTS applications_id_seq OWNED BY applications.id"))
+        for column, target in (
+            ("user_id", "users"),
+            ("resume_id", "resumes"),
+            ("cover_letter_id", "cover_letters"),
+            ("company_id", "companies"),
+        ):
+            conn.execute(text(
+                f"ALTER TABLE applications ADD FOREIGN KEY ({column}) REFERENCES {target} (id)"
+            ))
+
+        month = _month_start(first.date()) if first else _month_start(date.today())
+        last = _add_months(_month_start(date.today()), MONTHS_AHEAD)
+        while month <= last:
+            create_partition(conn, month)
+            month = _add_months(month, 1)
+        # Catches rows outside the pre-created range until `ensure` catches up
+        conn.execute(text("CREATE TABLE IF NOT EXISTS applications_default PARTITION OF applications DEFAULT"))
+
+        conn.execute(text("INSERT INTO applications SELECT * FROM applications_unpartitioned"))
+        if not keep_old:
+            conn.execute(text("DROP TABLE applications_unpartitioned"))
+
+    # The declared (user_id, ...) and company indexes, created on the new parent
+    ensure_search_schema(engine)
+    ensure_company_schema(engine)
+    ensure_indexes(engine)
+    print("✅ applications is now partitioned by month on created_at")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition the applications table (Postgres)")
+    parser.add_argument("command", choices=["convert", "ensure"])
+    parser.add_argument("--keep-old", action="store_true", help="keep applications_unpartitioned")
+    parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        convert(keep_old=args.keep_old)
+    else:
+        with engine.begin() as conn:
+            if not is_partitioned(conn):
+                raise SystemExit("applications is not partitioned; run `convert` first")
+            ensure_partitions(conn, args.months_ahead)
+        print("✅ Partitions ensured")
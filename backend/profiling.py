@@ -0,0 +1,152 @@
+# profiling.py
+# Opt-in cProfile capture of single requests.
+#
+# An admin mints a short-lived signed token (POST /admin/profiles/token) and
+# sends it with the slow request as an `X-Profile` header or `__profile` query
+# parameter. That one request runs under cProfile and the stats are written to
+# a bounded on-disk ring buffer that the admin endpoints list and serve.
+#
+# cProfile only sees the event loop thread: `async def` handlers and whatever
+# they call directly (SQLAlchemy queries, PDF/DOCX parsing, model calls). Plain
+# `def` endpoints, sync dependencies such as get_db, and run_in_threadpool work
+# run on threadpool threads and are missing from the profile. Other requests
+# interleaving with the profiled one on the loop can show up in it.
+#
+# Requests without the header/parameter only pay a dictionary lookup. Only one
+# profile runs at a time per worker (one cProfile hook per thread); a profiled
+# request arriving meanwhile is served unprofiled with `x-profile-skipped: busy`.
+import cProfile
+import hashlib
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from urllib.parse import parse_qs
+from starlette.concurrency import run_in_threadpool
+from config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "__profile"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(settings.UPLOAD_DIR, "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "20"))
+PROFILE_TOKEN_MAX_MINUTES = 60
+
+_NAME = re.compile(r"^[\w.-]+\.prof$")
+_write_lock = threading.Lock()
+# Set while a request is being profiled on this worker's event loop
+_active = False
+
+
+def _signature(expires: int) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def create_profile_token(minutes: int = 10) -> dict:
+    minutes = max(1, min(minutes, PROFILE_TOKEN_MAX_MINUTES))
+    expires = int(time.time()) + minutes * 60
+    return {"token": f"{expires}.{_signature(expires)}", "expires_at": expires}
+
+
+def verify_profile_token(token: str) -> bool:
+    try:
+        expires_raw, signature = token.split(".", 1)
+        expires = int(expires_raw)
+    except ValueError:
+        return False
+    return expires >= time.time() and hmac.compare_digest(signature, _signature(expires))
+
+
+def _profile_name(method: str, path: str) -> str:
+    slug = re.sub(r"[^\w]+", "_", path).strip("_")[:60] or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}_{os.urandom(3).hex()}_{method}_{slug}.prof"
+
+
+def _save(profiler: cProfile.Profile, name: str):
+    with _write_lock:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        # Ring buffer: drop the oldest captures beyond the limit
+        for old in list_profiles()[PROFILE_MAX_FILES:]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old["name"]))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> list:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    entries = []
+    for name in os.listdir(PROFILE_DIR):
+        if _NAME.match(name):
+            stat = os.stat(os.path.join(PROFILE_DIR, name))
+            entries.append({"name": name, "size": stat.st_size, "created_at": stat.st_mtime})
+    return sorted(entries, key=lambda e: (e["created_at"], e["name"]), reverse=True)
+
+
+def profile_path(name: str):
+    """Absolute path of a stored profile, or None for unknown/unsafe names."""
+    if not _NAME.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def profile_summary(path: str, sort: str = "cumulative", limit: int = 50) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry a valid profiling token."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _token(self, scope):
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER:
+                return value.decode("latin-1")
+        query = scope.get("query_string", b"")
+        if PROFILE_QUERY_PARAM.encode() in query:
+            values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY_PARAM)
+            return values[0] if values else None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = self._token(scope)
+        if not token or not verify_profile_token(token):
+            return await self.app(scope, receive, send)
+
+        global _active
+        if _active:
+            async def send_skipped(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-skipped", b"busy")]
+                await send(message)
+            return await self.app(scope, receive, send_skipped)
+
+        name = _profile_name(scope["method"], scope["path"])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", name.encode())]
+            await send(message)
+
+        # No await between the check above and this, so claiming is atomic on the loop
+        _active = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            _active = False
+            await run_in_threadpool(_save, profiler, name)
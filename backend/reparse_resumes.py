@@ -0,0 +1,51 @@
+# reparse_resumes.py
+# Re-run the structured resume parser over stored resumes whose parsed_data was
+# produced by an older PARSER_VERSION. Safe to interrupt and re-run.
+#
+#   python reparse_resumes.py [--batch-size 200] [--all]
+import argparse
+from database import SessionLocal
+from models import Resume
+from resume_parser import PARSER_VERSION, needs_reparse, parse_resume
+from resume_versions import resume_texts
+
+
+def reparse(batch_size: int = 200, force: bool = False) -> int:
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            # Keyset pagination so each batch is an indexed range scan
+            batch = db.query(Resume).filter(Resume.id > last_id)\
+                .order_by(Resume.id).limit(batch_size).all()
+            if not batch:
+                break
+            stale = [r for r in batch if force or needs_reparse(r.parsed_data)]
+            texts = resume_texts(db, stale)
+            for resume in stale:
+                if texts.get(resume.id) is None:
+                    continue
+                parsed = parse_resume(texts[resume.id])
+                if resume.document_id is not None:
+                    # Versioned resumes keep their text in resume_texts
+                    parsed.pop("text")
+                    parsed.pop("sections")
+                resume.parsed_data = parsed
+                updated += 1
+            last_id = batch[-1].id
+            db.commit()
+            db.expunge_all()
+            print(f"… up to resume {last_id}: {updated} reparsed")
+    finally:
+        db.close()
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Reparse resumes to parser version {PARSER_VERSION}")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--all", action="store_true", help="reparse even up-to-date resumes")
+    args = parser.parse_args()
+    count = reparse(batch_size=args.batch_size, force=args.all)
+    print(f"✅ Reparsed {count} resume(s)")
@@ -0,0 +1,494 @@
+# resume_analysis.py
+# The resume analysis prompt, and batch re-analysis of resumes it has outgrown.
+#
+# Bump RESUME_ANALYSIS_PROMPT_VERSION whenever resume_analysis_prompt changes.
+# Resumes analysed under an older version (resumes.analysis_version) are stale,
+# and an admin-started ReanalysisJob refreshes them through the OpenAI Batch
+# API, at batch pricing and without using interactive rate limits:
+#
+#   preparing    stale resumes' requests are written to a JSONL file
+#   submitting   the file is uploaded and the batch created
+#   in_progress  the batch is polled until it finishes
+#   applying     results are downloaded and written back in chunks
+#   completed / failed
+#
+# Each step is committed before the next starts, so a job interrupted anywhere
+# (deploy, crash) continues where it stopped when it is resumed, either from
+# POST /admin/reanalysis-jobs/{id}/resume or from the command line. A lease on
+# the job row keeps two workers from driving the same job.
+#
+#   python resume_analysis.py run [--max-resumes 5000] [--poll-seconds 60]
+#   python resume_analysis.py run --job 3        # resume job 3
+#
+# OPENAI_BATCH_BASE_URL points the Batch API calls elsewhere, e.g. at
+# benchmarks/batch_api_stub.py for local runs.
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from openai import OpenAI
+from sqlalchemy import inspect, or_, text as sql_text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from config import settings
+from llm_json import StructuredOutputError, parse_structured, resume_sections_schema, structured_request
+from llm_usage import estimate_cost, usage_ledger
+from model_router import request_params
+from models import ReanalysisJob, Resume
+from resume_parser import split_sections
+from resume_versions import merge_section_feedback, resume_texts, section_hashes
+
+logger = logging.getLogger(__name__)
+
+RESUME_ANALYSIS_PROMPT_VERSION = 1
+TASK = "resume_analysis"
+
+# Batch API limits are 50,000 requests and 200 MB per input file
+BATCH_MAX_REQUESTS = 50000
+BATCH_MAX_BYTES = 190 * 1024 * 1024
+BATCH_DISCOUNT = 0.5  # batch tokens cost half the interactive price
+BATCH_POLL_SECONDS = int(os.getenv("BATCH_POLL_SECONDS", "60"))
+BATCH_DIR = os.path.join(settings.UPLOAD_DIR, "batches")
+SELECT_BATCH_SIZE = 200
+APPLY_BATCH_SIZE = 200
+LEASE_SECONDS = 300
+# Failed requests quoted in a completed job's error; the rest are only logged
+FAILURE_SUMMARY_LIMIT = 20
+# cast_to for Batch API calls made through the client's generic get/post
+JSONObject = Dict[str, Any]
+FINISHED = ("completed", "failed")
+# Batch API statuses after which no more results will arrive
+BATCH_DONE = ("completed", "failed", "expired", "cancelled")
+
+
+def resume_analysis_prompt(sections: dict, names) -> str:
+    parts = "\n\n".join(f"[{name}]\n{sections[name]}" for name in names)
+    return f"""Review these sections of a resume. For each section, list formatting issues,
+    suggestions to improve the content, and the section's strengths and weaknesses.
+    The resume has these sections: {', '.join(sections)}.
+
+    {parts}
+    """
+
+
+def ensure_resume_analysis_schema(engine: Engine):
+    """Add resumes.analysis_version and reanalysis_jobs.error_file_id to older databases."""
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns("resumes")}
+    job_columns = {c["name"] for c in inspector.get_columns("reanalysis_jobs")}
+    with engine.begin() as conn:
+        if "analysis_version" not in columns:
+            conn.execute(sql_text("ALTER TABLE resumes ADD COLUMN analysis_version INTEGER"))
+        if "error_file_id" not in job_columns:
+            conn.execute(sql_text("ALTER TABLE reanalysis_jobs ADD COLUMN error_file_id VARCHAR(64)"))
+
+
+def _stale(query, version: int = RESUME_ANALYSIS_PROMPT_VERSION):
+    return query.filter(or_(Resume.analysis_version.is_(None), Resume.analysis_version < version))
+
+
+def stale_count(db: Session) -> int:
+    return _stale(db.query(Resume)).count()
+
+
+def batch_client() -> OpenAI:
+    return OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BATCH_BASE_URL or None)
+
+
+def job_progress(job: ReanalysisJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "batch_status": job.batch_status,
+        "prompt_version": job.prompt_version,
+        "model": job.model,
+        "total": job.total,
+        "completed_requests": job.completed_requests,
+        "failed_requests": job.failed_requests,
+        "applied": job.applied_lines,
+        "updated_resumes": job.updated_resumes,
+        # Requests written back or failed, of all requests in the batch
+        "percent": round(100 * min(job.applied_lines + job.failed_requests, job.total) / job.total, 1)
+        if job.total else None,
+        "batch_id": job.batch_id,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def create_job(db: Session, max_resumes: int = BATCH_MAX_REQUESTS, created_by: int = None) -> ReanalysisJob:
+    """Start a job; raises ValueError while another one is unfinished."""
+    if db.query(ReanalysisJob).filter(ReanalysisJob.status.notin_(FINISHED)).first():
+        raise ValueError("another re-analysis job is still running")
+    job = ReanalysisJob(
+        status="preparing",
+        prompt_version=RESUME_ANALYSIS_PROMPT_VERSION,
+        model=request_params(TASK)["model"],
+        max_resumes=min(max_resumes, BATCH_MAX_REQUESTS),
+        created_by=created_by,
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+class LeaseLost(Exception):
+    """Another worker took over the job while this one was still on a step."""
+
+
+def _renew_lease(db: Session, job_id: int, owner: str):
+    """Extend the lease within the current transaction; raises LeaseLost if it moved on."""
+    renewed = db.query(ReanalysisJob).filter(
+        ReanalysisJob.id == job_id,
+        ReanalysisJob.lease_owner == owner
+    ).update({"lease_until": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)},
+             synchronize_session=False)
+    if renewed != 1:
+        raise LeaseLost(f"re-analysis job {job_id} is now driven by another worker")
+
+
+def _finish(job: ReanalysisJob, status: str, error: str = None):
+    job.status = status
+    job.error = error
+    job.finished_at = datetime.utcnow()
+
+
+# Steps. Each one moves the job forward and commits; returns True when the job
+# is waiting on the Batch API and the driver should sleep before the next step.
+
+def prepare(db: Session, job: ReanalysisJob) -> bool:
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    # Batches below are committed and expunged, so read what the loop needs now
+    job_id, prompt_version, max_resumes = job.id, job.prompt_version, job.max_resumes
+    owner = job.lease_owner
+    path = os.path.join(BATCH_DIR, f"reanalysis-{job_id}.jsonl")
+    params = request_params(TASK)
+    params["model"] = job.model
+    count, size, last_id = 0, 0, 0
+    # Rewritten from scratch if a previous attempt died half way; named per
+    # owner so a worker that lost the lease never writes into its successor's file
+    tmp = f"{path}.{owner}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            while count < max_resumes and size < BATCH_MAX_BYTES:
+                batch = _stale(db.query(Resume), prompt_version).filter(
+                    Resume.id > last_id
+                ).order_by(Resume.id).limit(SELECT_BATCH_SIZE).all()
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                texts = resume_texts(db, batch)
+                for resume in batch:
+                    sections = split_sections(texts.get(resume.id, ""))
+                    if not sections:
+                        # Nothing to ask the model; stamp the empty feedback an upload would get
+                        resume.ai_feedback = merge_section_feedback({}, {}, {})
+                        resume.analysis_version = prompt_version
+                        continue
+                    line = json.dumps({
+                        "custom_id": f"resume-{resume.id}",
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {**params, **structured_request(
+                            TASK, resume_analysis_prompt(sections, sections), resume_sections_schema(sections)
+                        )},
+                    }) + "\n"
+                    out.write(line)
+                    count += 1
+                    size += len(line.encode("utf-8"))
+                    if count >= max_resumes or size >= BATCH_MAX_BYTES:
+                        break
+                # Writing a large file outlasts one lease; renew it per batch
+                _renew_lease(db, job_id, owner)
+                db.commit()
+                db.expunge_all()
+                logger.info("Re-analysis job %s: %s request(s) written", job_id, count)
+        _renew_lease(db, job_id, owner)
+        os.replace(tmp, path)
+    except LeaseLost:
+        os.remove(tmp)
+        raise
+
+    job = db.get(ReanalysisJob, job_id)
+    job.input_path, job.total = path, count
+    if count:
+        job.status = "submitting"
+    else:
+        _finish(job, "completed")
+    db.commit()
+    return False
+
+
+def submit(db: Session, job: ReanalysisJob, client: OpenAI) -> bool:
+    if not job.input_file_id:
+        with open(job.input_path, "rb") as fh:
+            uploaded = client.files.create(file=(os.path.basename(job.input_path), fh), purpose="batch")
+        job.input_file_id = uploaded.id
+        db.commit()
+    if not job.batch_id:
+        # A crash between creating the batch and committing its id would
+        # otherwise submit (and pay for) the same file twice
+        listed = client.get("/batches", cast_to=JSONObject, options={"params": {"limit": 100}})
+        batch = next((b for b in listed.get("data", []) if b.get("input_file_id") == job.input_file_id), None)
+        if batch is None:
+            batch = client.post("/batches", cast_to=JSONObject, body={
+                "input_file_id": job.input_file_id,
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+                "metadata": {"reanalysis_job": str(job.id)},
+            })
+        job.batch_id = batch["id"]
+        job.batch_status = batch.get("status")
+    job.status = "in_progress"
+    db.commit()
+    return False
+
+
+def poll(db: Session, job: ReanalysisJob, client: OpenAI) -> bool:
+    batch = client.get(f"/batches/{job.batch_id}", cast_to=JSONObject)
+    counts = batch.get("request_counts") or {}
+    job.batch_status = batch.get("status")
+    job.completed_requests = counts.get("completed", 0)
+    job.failed_requests = counts.get("failed", 0)
+    if job.batch_status not in BATCH_DONE:
+        db.commit()
+        return True
+    # Expired and cancelled batches still return whatever finished in time
+    job.output_file_id = batch.get("output_file_id")
+    job.error_file_id = batch.get("error_file_id")
+    if job.output_file_id or job.error_file_id:
+        job.status = "applying"
+    else:
+        errors = (batch.get("errors") or {}).get("data") or []
+        _finish(job, "failed", "; ".join(e.get("message", "") for e in errors) or f"batch {job.batch_status}")
+    db.commit()
+    return False
+
+
+def _download(job: ReanalysisJob, client: OpenAI, file_id: str, kind: str) -> list:
+    """Non-empty lines of a batch output or error file, kept on disk across restarts."""
+    path = os.path.join(BATCH_DIR, f"reanalysis-{job.id}-{kind}.jsonl")
+    if not os.path.exists(path):
+        os.makedirs(BATCH_DIR, exist_ok=True)
+        content = client.files.content(file_id)
+        with open(path + ".tmp", "wb") as fh:
+            fh.write(content.content)
+        os.replace(path + ".tmp", path)
+    with open(path, encoding="utf-8") as fh:
+        return [line for line in fh if line.strip()]
+
+
+def _failure(result: dict) -> str:
+    """Why a batch request failed, from its output or error file line."""
+    response = result.get("response") or {}
+    error = result.get("error") or (response.get("body") or {}).get("error") or {}
+    return f"{response.get('status_code', 'no response')} {error.get('message') or error.get('code') or 'unknown error'}"
+
+
+def _raw_arguments(body: dict) -> str:
+    message = body["choices"][0]["message"]
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        return tool_calls[0]["function"]["arguments"]
+    return message.get("content")
+
+
+def _apply_chunk(db: Session, job: ReanalysisJob, lines: list) -> int:
+    results = {}
+    for line in lines:
+        result = json.loads(line)
+        resume_id = int(result["custom_id"].split("-", 1)[1])
+        response = result.get("response") or {}
+        if response.get("status_code") == 200:
+            results[resume_id] = response["body"]
+        else:
+            logger.warning("Batch request for resume %s failed in job %s: %s", resume_id, job.id, _failure(result))
+
+    # Resumes analysed again meanwhile (a newer upload path) are left alone
+    resumes = _stale(db.query(Resume), job.prompt_version).filter(Resume.id.in_(results)).all()
+    texts = resume_texts(db, resumes)
+    updated = 0
+    for resume in resumes:
+        body = results[resume.id]
+        sections = split_sections(texts.get(resume.id, ""))
+        schema = resume_sections_schema(sections)
+        usage = body.get("usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        model = body.get("model", job.model)
+        try:
+            by_section = parse_structured(TASK, _raw_arguments(body), schema)
+        except (StructuredOutputError, KeyError, IndexError) as exc:
+            logger.warning("Unusable batch result for resume %s: %s", resume.id, exc)
+            outcome = "error"
+        else:
+            resume.ai_feedback = merge_section_feedback(sections, section_hashes(sections), by_section)
+            resume.analysis_version = job.prompt_version
+            updated += 1
+            outcome = "ok"
+        usage_ledger.record(
+            TASK, model, outcome, 0.0, resume.user_id,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            cost_usd=estimate_cost(model, prompt_tokens, completion_tokens) * BATCH_DISCOUNT,
+        )
+    return updated
+
+
+def apply_results(db: Session, job: ReanalysisJob, client: OpenAI) -> bool:
+    lines = _download(job, client, job.output_file_id, "output") if job.output_file_id else []
+    while job.applied_lines < len(lines):
+        chunk = lines[job.applied_lines:job.applied_lines + APPLY_BATCH_SIZE]
+        job.updated_resumes += _apply_chunk(db, job, chunk)
+        job.applied_lines += len(chunk)
+        job.lease_until = datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+        db.commit()
+        logger.info("Re-analysis job %s: %s/%s results applied, %s resume(s) updated",
+                    job.id, job.applied_lines, len(lines), job.updated_resumes)
+
+    # Failed requests leave their resumes stale for the next job
+    failures = []
+    if job.error_file_id:
+        for line in _download(job, client, job.error_file_id, "errors"):
+            result = json.loads(line)
+            failures.append(f"{result.get('custom_id')}: {_failure(result)}")
+            logger.warning("Batch request %s failed in job %s: %s", result.get("custom_id"), job.id, _failure(result))
+    summary = None
+    if failures:
+        summary = f"{len(failures)} request(s) failed: " + "; ".join(failures[:FAILURE_SUMMARY_LIMIT])
+        if len(failures) > FAILURE_SUMMARY_LIMIT:
+            summary += f"; … {len(failures) - FAILURE_SUMMARY_LIMIT} more in the logs"
+    _finish(job, "completed", summary)
+    db.commit()
+    return False
+
+
+# Driving
+
+def claim(db: Session, job_id: int, owner: str) -> bool:
+    """Take or renew the job's lease; False while another worker holds it."""
+    now = datetime.utcnow()
+    claimed = db.query(ReanalysisJob).filter(
+        ReanalysisJob.id == job_id,
+        or_(ReanalysisJob.lease_until.is_(None), ReanalysisJob.lease_until < now,
+            ReanalysisJob.lease_owner == owner)
+    ).update({"lease_owner": owner, "lease_until": now + timedelta(seconds=LEASE_SECONDS)},
+             synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+def release(db: Session, job_id: int, owner: str):
+    db.query(ReanalysisJob).filter(
+        ReanalysisJob.id == job_id,
+        ReanalysisJob.lease_owner == owner
+    ).update({"lease_owner": None, "lease_until": None}, synchronize_session=False)
+    db.commit()
+
+
+def run_job(job_id: int, poll_seconds: int = BATCH_POLL_SECONDS, session_factory=None, client: OpenAI = None):
+    """Drive a job until it finishes. Errors leave it resumable at its current step."""
+    if session_factory is None:
+        from database import SessionLocal
+        session_factory = SessionLocal
+    client = client or batch_client()
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    db = session_factory()
+    resumed = False
+    try:
+        while True:
+            if not claim(db, job_id, owner):
+                logger.info("Re-analysis job %s is being driven by another worker", job_id)
+                return None
+            job = db.get(ReanalysisJob, job_id)
+            if job.status in FINISHED:
+                return job.status
+            if not resumed:
+                job.error, resumed = None, True  # from an earlier, interrupted run
+            if job.status == "preparing":
+                waiting = prepare(db, job)
+            elif job.status == "submitting":
+                waiting = submit(db, job, client)
+            elif job.status == "in_progress":
+                waiting = poll(db, job, client)
+            else:
+                waiting = apply_results(db, job, client)
+            if waiting:
+                logger.info("Re-analysis job %s: batch %s, %s/%s requests done", job_id, job.batch_status,
+                            job.completed_requests + job.failed_requests, job.total)
+                time.sleep(poll_seconds)
+    except LeaseLost:
+        db.rollback()
+        logger.info("Re-analysis job %s was taken over by another worker", job_id)
+        return None
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Re-analysis job %s stopped; resume it to continue", job_id)
+        job = db.get(ReanalysisJob, job_id)
+        job.error = str(exc)
+        db.commit()
+        raise
+    finally:
+        try:
+            release(db, job_id, owner)
+        finally:
+            db.close()
+
+
+_running = set()
+_running_lock = threading.Lock()
+
+
+def start_job_thread(job_id: int):
+    """Drive the job from a background thread in this worker (no-op if already running here)."""
+    with _running_lock:
+        if job_id in _running:
+            return
+        _running.add(job_id)
+
+    def target():
+        try:
+            run_job(job_id)
+        except Exception:
+            pass  # logged and stored on the job by run_job
+        finally:
+            with _running_lock:
+                _running.discard(job_id)
+
+    threading.Thread(target=target, name=f"reanalysis-job-{job_id}", daemon=True).start()
+
+
+if __name__ == "__main__":
+    from database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Re-analyse stale resumes through the Batch API")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--job", type=int, help="resume this job instead of starting a new one")
+    parser.add_argument("--max-resumes", type=int, default=BATCH_MAX_REQUESTS)
+    parser.add_argument("--poll-seconds", type=int, default=BATCH_POLL_SECONDS)
+    args = parser.parse_args()
+
+    # The steps report progress through the logger; show it on the console
+    logging.basicConfig(format="… %(message)s")
+    logger.setLevel(logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    ensure_resume_analysis_schema(engine)
+    job_id = args.job
+    if job_id is None:
+        db = SessionLocal()
+        try:
+            print(f"… {stale_count(db)} stale resume(s)")
+            job_id = create_job(db, args.max_resumes).id
+        finally:
+            db.close()
+    status = run_job(job_id, args.poll_seconds)
+    db = SessionLocal()
+    try:
+        job = db.get(ReanalysisJob, job_id)
+        print(f"✅ Job {job_id} {status or job.status}: {job.updated_resumes}/{job.total} resume(s) updated")
+    finally:
+        db.close()
@@ -0,0 +1,221 @@
+# resume_parser.py
+# Rule-based resume parser. Runs once at upload so downstream features can pick
+# the sections they need instead of resending the whole resume text.
+import re
+
+# Bump whenever the parser output changes; reparse_resumes.py re-runs every
+# resume whose stored parsed_data has an older version.
+PARSER_VERSION = 1
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "objective", "about me", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "education": ["education", "academic background", "education and training", "qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills", "technologies",
+               "tools", "tools and technologies", "competencies", "expertise"],
+    "projects": ["projects", "personal projects", "selected projects"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications"],
+    "languages": ["languages"],
+    "awards": ["awards", "honors", "achievements"],
+}
+_HEADING_LOOKUP = {h: section for section, hs in SECTION_HEADINGS.items() for h in hs}
+
+# Lowercase alias -> canonical skill name
+SKILL_ALIASES = {
+    "js": "JavaScript", "javascript": "JavaScript", "ecmascript": "JavaScript",
+    "ts": "TypeScript", "typescript": "TypeScript",
+    "py": "Python", "python": "Python", "python3": "Python",
+    "golang": "Go", "go": "Go",
+    "c#": "C#", "csharp": "C#", "c++": "C++", "cpp": "C++",
+    "java": "Java", "kotlin": "Kotlin", "rust": "Rust", "ruby": "Ruby", "php": "PHP",
+    "react": "React", "reactjs": "React", "react.js": "React",
+    "next": "Next.js", "nextjs": "Next.js", "next.js": "Next.js",
+    "vue": "Vue.js", "vuejs": "Vue.js", "vue.js": "Vue.js",
+    "angular": "Angular", "angularjs": "Angular",
+    "node": "Node.js", "nodejs": "Node.js", "node.js": "Node.js",
+    "django": "Django", "flask": "Flask", "fastapi": "FastAPI", "spring": "Spring",
+    "postgres": "PostgreSQL", "postgresql": "PostgreSQL", "psql": "PostgreSQL",
+    "mysql": "MySQL", "sqlite": "SQLite", "mongo": "MongoDB", "mongodb": "MongoDB",
+    "redis": "Redis", "sql": "SQL", "nosql": "NoSQL",
+    "k8s": "Kubernetes", "kubernetes": "Kubernetes", "docker": "Docker",
+    "aws": "AWS", "amazon web services": "AWS", "gcp": "GCP", "google cloud": "GCP",
+    "azure": "Azure", "terraform": "Terraform", "ci/cd": "CI/CD", "git": "Git",
+    "linux": "Linux", "graphql": "GraphQL", "rest": "REST", "html": "HTML", "css": "CSS",
+    "tailwind": "Tailwind CSS", "tailwindcss": "Tailwind CSS",
+    "ml": "Machine Learning", "machine learning": "Machine Learning",
+    "nlp": "NLP", "pandas": "pandas", "numpy": "NumPy", "pytorch": "PyTorch",
+    "tensorflow": "TensorFlow", "excel": "Excel", "tableau": "Tableau", "power bi": "Power BI",
+    "agile": "Agile", "scrum": "Scrum", "jira": "Jira", "figma": "Figma",
+}
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})"
+_DATE_RANGE = re.compile(
+    rf"(?P<start>{_DATE})\s*(?:-|–|—|to)\s*(?P<end>{_DATE}|present|current|now)",
+    re.IGNORECASE,
+)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?:\+?\d[\d\s().-]{7,}\d)")
+_URL = re.compile(r"(?:https?://)?(?:www\.)?(?:linkedin\.com|github\.com|gitlab\.com)/[\w\-/.%]+", re.IGNORECASE)
+_DEGREE = re.compile(
+    r"\b(?:b\.?sc?|b\.?a|b\.?eng|bachelor|m\.?sc?|m\.?a|m\.?eng|master|mba|ph\.?d|doctor|associate|diploma|hnd|ond)\b",
+    re.IGNORECASE,
+)
+_BULLET = re.compile(r"^\s*(?:[-•*·▪●◦]|\d+[.)])\s*")
+_SKILL_SPLIT = re.compile(r"[,;|•·▪●\n]|\s{2,}|\s/\s")
+
+
+def _heading(line: str):
+    candidate = re.sub(r"[^a-z& ]", "", line.lower().replace("&", "and")).strip()
+    if not candidate or len(candidate) > 40:
+        return None
+    return _HEADING_LOOKUP.get(candidate)
+
+
+def split_sections(text: str) -> dict:
+    """Split resume text on known headings. Text before the first heading is 'header'."""
+    sections = {"header": []}
+    current = "header"
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        section = _heading(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines) for name, lines in sections.items() if lines}
+
+
+def normalize_skill(skill: str):
+    cleaned = _BULLET.sub("", skill).strip(" .:-\t")
+    if not cleaned or len(cleaned) > 40:
+        return None
+    return SKILL_ALIASES.get(cleaned.lower(), cleaned)
+
+
+def normalize_skills(raw_skills) -> list:
+    seen = set()
+    skills = []
+    for raw in raw_skills:
+        skill = normalize_skill(raw)
+        if skill and skill.lower() not in seen:
+            seen.add(skill.lower())
+            skills.append(skill)
+    return skills
+
+
+def parse_skills(section_text: str) -> list:
+    raw = []
+    for line in section_text.splitlines():
+        # "Languages: Python, Go" -> drop the label
+        if ":" in line:
+            line = line.split(":", 1)[1]
+        raw.extend(_SKILL_SPLIT.split(line))
+    return normalize_skills(raw)
+
+
+def parse_contact(header_text: str, full_text: str) -> dict:
+    email = _EMAIL.search(full_text)
+    phone = _PHONE.search(header_text) or _PHONE.search(full_text)
+    name = None
+    for line in header_text.splitlines():
+        if _EMAIL.search(line) or any(ch.isdigit() for ch in line):
+            continue
+        if 1 <= len(line.split()) <= 5:
+            name = line
+            break
+    return {
+        "name": name,
+        "email": email.group(0) if email else None,
+        "phone": phone.group(0).strip() if phone else None,
+        "links": sorted(set(m.group(0) for m in _URL.finditer(full_text))),
+    }
+
+
+def _split_role(header: str) -> dict:
+    header = header.strip(" ,|-–—")
+    for sep in (" at ", " @ ", " | ", " – ", " — ", " - ", ", "):
+        if sep in header:
+            title, company = header.split(sep, 1)
+            return {"title": title.strip(), "company": company.strip(" ,|-–—")}
+    return {"title": header or None, "company": None}
+
+
+def parse_experience(section_text: str) -> list:
+    entries = []
+    pending = []  # non-bullet lines not yet known to be a header or a description
+
+    def flush():
+        if entries:
+            entries[-1]["highlights"].extend(pending)
+        pending.clear()
+
+    for line in section_text.splitlines():
+        match = _DATE_RANGE.search(line)
+        if match:
+            header = (line[:match.start()] + line[match.end():]).strip(" ,|-–—()")
+            if header:
+                flush()
+                entry = _split_role(header)
+            else:
+                # Dates on their own line: the one or two lines above are the header
+                header_lines = pending[-2:]
+                del pending[-2:]
+                flush()
+                if len(header_lines) == 2:
+                    entry = {"title": header_lines[0], "company": header_lines[1]}
+                else:
+                    entry = _split_role(header_lines[0] if header_lines else "")
+            entry.update(start=match.group("start"), end=match.group("end"), highlights=[])
+            entries.append(entry)
+        elif _BULLET.match(line):
+            flush()
+            if entries:
+                entries[-1]["highlights"].append(_BULLET.sub("", line))
+        elif entries and entries[-1]["company"] is None and not entries[-1]["highlights"] and not pending:
+            # Line right after a "Title  2020 - 2022" line is usually the company
+            entries[-1]["company"] = line
+        else:
+            pending.append(line)
+    flush()
+    return entries
+
+
+def parse_education(section_text: str) -> list:
+    entries = []
+    for line in section_text.splitlines():
+        match = _DATE_RANGE.search(line)
+        years = re.findall(r"\b(?:19|20)\d{2}\b", line)
+        if _DEGREE.search(line) or match or not entries:
+            entries.append({
+                "description": _BULLET.sub("", line),
+                "degree": bool(_DEGREE.search(line)),
+                "start": match.group("start") if match else None,
+                "end": match.group("end") if match else (years[-1] if years else None),
+            })
+        else:
+            entries[-1]["description"] += " " + line
+    return entries
+
+
+def parse_resume(text: str) -> dict:
+    """Structured parsed_data for a resume. Keeps the raw text under 'text'."""
+    sections = split_sections(text or "")
+    return {
+        "text": text,
+        "parser_version": PARSER_VERSION,
+        "contact": parse_contact(sections.get("header", ""), text or ""),
+        "summary": sections.get("summary"),
+        "experience": parse_experience(sections.get("experience", "")),
+        "education": parse_education(sections.get("education", "")),
+        "skills": parse_skills(sections.get("skills", "")),
+        "sections": sections,
+    }
+
+
+def needs_reparse(parsed_data) -> bool:
+    return not parsed_data or parsed_data.get("parser_version", 0) < PARSER_VERSION
@@ -0,0 +1,352 @@
+# resume_versions.py
+# Versioned resumes with deduplicated text storage.
+#
+# Uploads that revise an existing resume join its ResumeDocument as the next
+# version instead of standing alone. The first version's text is stored whole;
+# later versions store a line delta against it, or become the new base when
+# they have drifted so far that a delta would not be smaller. Every stored
+# delta is one hop from a full text, so reading a version never replays a chain.
+# parsed_data keeps the structured fields only, and the text is read through
+# resume_text().
+#
+#   python resume_versions.py backfill [--batch-size 200]
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import zlib
+from sqlalchemy import inspect, text as sql_text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import Resume, ResumeDocument, ResumeText
+from resume_parser import parse_resume, split_sections
+
+# A new upload joins an existing document when its text is at least this
+# similar to the document's latest version (or it has the same file name and
+# is at least half similar)
+SIMILARITY_THRESHOLD = 0.75
+SAME_NAME_THRESHOLD = 0.5
+# Store a delta only when it compresses to less than this share of the full text
+DELTA_MAX_RATIO = 0.5
+# Concurrent uploads of one document race for the next version number
+VERSION_ATTEMPTS = 5
+VERSION_CONSTRAINT = "uq_resumes_document_version"
+
+
+def ensure_resume_version_schema(engine: Engine):
+    """Add resumes.document_id / version and their uniqueness to databases created before versioning."""
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns("resumes")}
+    unique = {c["name"] for c in inspector.get_unique_constraints("resumes")} | \
+        {i["name"] for i in inspector.get_indexes("resumes")}
+    with engine.begin() as conn:
+        if "document_id" not in columns:
+            conn.execute(sql_text("ALTER TABLE resumes ADD COLUMN document_id INTEGER REFERENCES resume_documents (id)"))
+        if "version" not in columns:
+            conn.execute(sql_text("ALTER TABLE resumes ADD COLUMN version INTEGER"))
+        if VERSION_CONSTRAINT not in unique:
+            # Renumber documents whose versions were duplicated before the index existed
+            duplicated = conn.execute(sql_text(
+                "SELECT DISTINCT document_id FROM resumes WHERE document_id IS NOT NULL "
+                "GROUP BY document_id, version HAVING COUNT(*) > 1"
+            )).scalars().all()
+            for document_id in duplicated:
+                ids = conn.execute(sql_text(
+                    "SELECT id FROM resumes WHERE document_id = :document_id ORDER BY version, id"
+                ), {"document_id": document_id}).scalars().all()
+                for version, resume_id in enumerate(ids, start=1):
+                    conn.execute(sql_text("UPDATE resumes SET version = :version WHERE id = :id"),
+                                 {"version": version, "id": resume_id})
+            conn.execute(sql_text(f"CREATE UNIQUE INDEX {VERSION_CONSTRAINT} ON resumes (document_id, version)"))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_delta(base_lines: list, lines: list) -> list:
+    """Ops rebuilding ``lines`` from ``base_lines``: ["=", i, j] copies base[i:j], ["+", [...]] inserts."""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append(["+", lines[j1:j2]])
+    return ops
+
+
+def apply_delta(base_lines: list, ops: list) -> list:
+    lines = []
+    for op in ops:
+        if op[0] == "=":
+            lines.extend(base_lines[op[1]:op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
+
+
+def _split(text: str) -> list:
+    return text.split("\n")
+
+
+def store_text(db: Session, resume: Resume, text: str, base: ResumeText = None):
+    full = zlib.compress(text.encode("utf-8"), 9)
+    row = ResumeText(resume_id=resume.id, text_hash=text_hash(text), payload=full)
+    if base is not None:
+        base_text = zlib.decompress(base.payload).decode("utf-8")
+        delta = zlib.compress(json.dumps(make_delta(_split(base_text), _split(text))).encode("utf-8"), 9)
+        if len(delta) < len(full) * DELTA_MAX_RATIO:
+            row.base_resume_id = base.resume_id
+            row.payload = delta
+    db.add(row)
+    return row
+
+
+def _base_for(db: Session, previous: Resume):
+    """The full-text row the next version after ``previous`` should delta against."""
+    if previous is None:
+        return None
+    latest = db.query(ResumeText).filter(ResumeText.resume_id == previous.id).first()
+    if latest is None or latest.base_resume_id is None:
+        return latest
+    return db.query(ResumeText).filter(ResumeText.resume_id == latest.base_resume_id).first()
+
+
+def _load_texts(db: Session, rows: list) -> dict:
+    """{resume_id: text} for ResumeText rows, fetching each needed base once."""
+    base_ids = {row.base_resume_id for row in rows if row.base_resume_id}
+    bases = {
+        base.resume_id: zlib.decompress(base.payload).decode("utf-8")
+        for base in db.query(ResumeText).filter(ResumeText.resume_id.in_(base_ids))
+    } if base_ids else {}
+    texts = {}
+    for row in rows:
+        if row.base_resume_id is None:
+            texts[row.resume_id] = zlib.decompress(row.payload).decode("utf-8")
+        else:
+            ops = json.loads(zlib.decompress(row.payload).decode("utf-8"))
+            texts[row.resume_id] = "\n".join(apply_delta(_split(bases[row.base_resume_id]), ops))
+    return texts
+
+
+def resume_texts(db: Session, resumes) -> dict:
+    """{resume_id: full text} for the given resumes."""
+    texts = {}
+    stored_ids = []
+    for resume in resumes:
+        legacy = (resume.parsed_data or {}).get("text")
+        if legacy is not None:
+            texts[resume.id] = legacy  # uploaded before versioning
+        else:
+            stored_ids.append(resume.id)
+    if stored_ids:
+        rows = db.query(ResumeText).filter(ResumeText.resume_id.in_(stored_ids)).all()
+        texts.update(_load_texts(db, rows))
+    return texts
+
+
+def resume_text(db: Session, resume: Resume) -> str:
+    return resume_texts(db, [resume]).get(resume.id, "")
+
+
+def similarity(a: str, b: str) -> float:
+    matcher = difflib.SequenceMatcher(None, _split(a), _split(b), autojunk=False)
+    # quick_ratio is an upper bound, so most unrelated documents stop here
+    if matcher.quick_ratio() < SAME_NAME_THRESHOLD:
+        return 0.0
+    return matcher.ratio()
+
+
+def _title(file_name: str) -> str:
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def latest_versions(db: Session, user_id: int) -> list:
+    """The newest version of each of the user's documents."""
+    latest = {}
+    for resume in db.query(Resume).filter(
+        Resume.user_id == user_id,
+        Resume.document_id.isnot(None)
+    ).order_by(Resume.document_id, Resume.version):
+        latest[resume.document_id] = resume
+    return list(latest.values())
+
+
+def match_document(db: Session, user_id: int, file_name: str, text: str):
+    """Latest version of the document this upload most likely revises, or None."""
+    candidates = latest_versions(db, user_id)
+    texts = resume_texts(db, candidates)
+    best, best_score = None, 0.0
+    for resume in candidates:
+        score = similarity(texts.get(resume.id, ""), text)
+        same_name = _title(resume.file_name) == _title(file_name)
+        if (score >= SIMILARITY_THRESHOLD or (same_name and score >= SAME_NAME_THRESHOLD)) and score > best_score:
+            best, best_score = resume, score
+    return best
+
+
+def find_previous(db: Session, user_id: int, file_name: str, text: str, document_id: int = None):
+    """(document, latest version) an upload revises; (None, None) starts a new document.
+
+    ``document_id`` picks the document explicitly; otherwise the best match
+    among the user's documents is used. Read-only, so callers can run the AI
+    analysis before opening a write transaction.
+    """
+    if document_id is not None:
+        document = db.query(ResumeDocument).filter(
+            ResumeDocument.id == document_id,
+            ResumeDocument.user_id == user_id
+        ).first()
+        if document is None:
+            raise LookupError(f"resume document {document_id} not found")
+        previous = db.query(Resume).filter(
+            Resume.document_id == document.id
+        ).order_by(Resume.version.desc()).first()
+        return document, previous
+    previous = match_document(db, user_id, file_name, text)
+    return (previous.document, previous) if previous else (None, None)
+
+
+def add_version(db: Session, user_id: int, file_name: str, file_path: str, text: str,
+                document: ResumeDocument = None, previous: Resume = None) -> Resume:
+    """Create the Resume row (and its stored text) for an upload; the caller commits."""
+    if document is None:
+        document = ResumeDocument(user_id=user_id, title=_title(file_name))
+        db.add(document)
+        db.flush()
+
+    parsed = parse_resume(text)
+    parsed.pop("text")
+    parsed.pop("sections")
+    for attempt in range(VERSION_ATTEMPTS):
+        resume = Resume(
+            user_id=user_id,
+            document_id=document.id,
+            version=(previous.version or 0) + 1 if previous else 1,
+            file_path=file_path,
+            file_name=file_name,
+            parsed_data=dict(parsed),
+        )
+        try:
+            with db.begin_nested():
+                db.add(resume)
+            break
+        except IntegrityError:
+            if attempt == VERSION_ATTEMPTS - 1:
+                raise
+            # Another upload took this version number first; follow it
+            previous = db.query(Resume).filter(
+                Resume.document_id == document.id
+            ).order_by(Resume.version.desc()).first()
+    store_text(db, resume, text, _base_for(db, previous))
+    return resume
+
+
+# Sections every resume is expected to have; reported as missing_sections
+CORE_SECTIONS = ("summary", "experience", "education", "skills")
+FEEDBACK_LISTS = ("formatting_issues", "content_suggestions", "strengths", "weaknesses")
+
+
+def section_hashes(sections: dict) -> dict:
+    return {name: text_hash(body) for name, body in sections.items()}
+
+
+def reusable_feedback(hashes: dict, previous_feedback) -> dict:
+    """{section: feedback} from the previous version for sections whose text is unchanged."""
+    previous = (previous_feedback or {}).get("sections") or {}
+    return {
+        name: previous[name]["feedback"]
+        for name, digest in hashes.items()
+        if name in previous and previous[name].get("hash") == digest
+    }
+
+
+def merge_section_feedback(sections: dict, hashes: dict, by_section: dict) -> dict:
+    """Resume-level ai_feedback from per-section feedback, keeping the parts for reuse."""
+    merged = {key: [] for key in FEEDBACK_LISTS}
+    for name in sections:
+        for key in FEEDBACK_LISTS:
+            for item in by_section.get(name, {}).get(key, []):
+                if item not in merged[key]:
+                    merged[key].append(item)
+    return {
+        "missing_sections": [name.title() for name in CORE_SECTIONS if name not in sections],
+        **merged,
+        "sections": {
+            name: {"hash": hashes[name], "feedback": by_section.get(name, {})}
+            for name in sections
+        },
+    }
+
+
+def diff_versions(old_text: str, new_text: str, context: int = 2) -> dict:
+    old_sections, new_sections = split_sections(old_text), split_sections(new_text)
+    return {
+        "sections": {
+            "added": [s for s in new_sections if s not in old_sections],
+            "removed": [s for s in old_sections if s not in new_sections],
+            "changed": [s for s in new_sections if s in old_sections and new_sections[s] != old_sections[s]],
+            "unchanged": [s for s in new_sections if old_sections.get(s) == new_sections[s]],
+        },
+        "diff": list(difflib.unified_diff(
+            _split(old_text), _split(new_text), "previous", "current", n=context, lineterm=""
+        )),
+    }
+
+
+def backfill(db: Session, batch_size: int = 200) -> int:
+    """Group pre-versioning resumes into documents and move their text out of parsed_data."""
+    migrated = 0
+    last_id = 0
+    while True:
+        batch = db.query(Resume).filter(
+            Resume.id > last_id,
+            Resume.document_id.is_(None)
+        ).order_by(Resume.id).limit(batch_size).all()
+        if not batch:
+            break
+        for legacy in batch:
+            data = dict(legacy.parsed_data or {})
+            text = data.pop("text", None)
+            if text is None:
+                continue
+            previous = match_document(db, legacy.user_id, legacy.file_name, text)
+            if previous is None:
+                document = ResumeDocument(user_id=legacy.user_id, title=_title(legacy.file_name),
+                                          created_at=legacy.created_at)
+                db.add(document)
+                db.flush()
+                legacy.document_id, legacy.version = document.id, 1
+                store_text(db, legacy, text)
+            else:
+                legacy.document_id, legacy.version = previous.document_id, (previous.version or 0) + 1
+                store_text(db, legacy, text, _base_for(db, previous))
+            data.pop("sections", None)
+            legacy.parsed_data = data
+            db.flush()
+            migrated += 1
+        last_id = batch[-1].id
+        db.commit()
+        print(f"… up to resume {last_id}: {migrated} migrated")
+    return migrated
+
+
+if __name__ == "__main__":
+    from database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Resume versioning tools")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    ensure_resume_version_schema(engine)
+    db = SessionLocal()
+    try:
+        count = backfill(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"✅ Versioned {count} resume(s)")
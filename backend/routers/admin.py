@@ -1,12 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, distinct
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
-from database import get_db
-from models import User, Application
-from auth import get_current_user
+from database import get_analytics_db, get_db
+from models import User, Application, Company, ReanalysisJob
+from routers.auth import get_current_user
+from llm_json import structured_output_stats
+from model_router import ROUTES, model_health
+from profiling import create_profile_token, list_profiles, profile_path, profile_summary
+from status_history import funnel, time_in_stage
+from llm_usage import task_rollup, top_users
+from resume_analysis import (BATCH_MAX_REQUESTS, FINISHED, create_job, job_progress, stale_count,
+                             start_job_thread)
 
 router = APIRouter(
     prefix="/admin",
@@ -16,7 +24,7 @@ router = APIRouter(
 @router.get("/dashboard-stats")
 async def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to access admin features")
@@ -27,8 +35,8 @@ async def get_dashboard_stats(
     # Get total applications count
     total_applications = db.query(func.count(Application.id)).scalar()
     
-    # Get unique companies count
-    total_companies = db.query(func.count(distinct(Application.company_name))).scalar()
+    # Get unique companies count (indexed integer FK, see companies.py)
+    total_companies = db.query(func.count(distinct(Application.company_id))).scalar()
     
     # Get applications by status
     applications_by_status = db.query(
@@ -44,11 +52,20 @@ async def get_dashboard_stats(
     recent_users = db.query(func.count(User.id))\
         .filter(User.created_at >= seven_days_ago).scalar()
     
+    top_companies = db.query(
+        Company.name,
+        func.count(Application.id).label("applications")
+    ).join(Application, Application.company_id == Company.id)\
+        .group_by(Company.id, Company.name)\
+        .order_by(func.count(Application.id).desc())\
+        .limit(10).all()
+    
     return {
         "total_users": total_users,
         "total_applications": total_applications,
         "total_companies": total_companies,
         "applications_by_status": dict(applications_by_status),
+        "top_companies": [{"name": name, "applications": count} for name, count in top_companies],
         "recent_activity": {
             "new_applications": recent_applications,
             "new_users": recent_users
@@ -58,7 +75,7 @@ async def get_dashboard_stats(
 @router.get("/user-stats")
 async def get_user_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to access admin features")
@@ -82,7 +99,7 @@ async def get_user_stats(
 @router.get("/application-stats")
 async def get_application_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to access admin features")
@@ -105,4 +122,189 @@ async def get_application_stats(
     return {
         "applications_by_month": dict(applications_by_month),
         "average_applications_per_user": round(avg_applications or 0, 2)
-    } 
\ No newline at end of file
+    }
+
+@router.get("/ai-stats")
+async def get_ai_stats(
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    # Per-task structured output outcomes for this worker
+    return {
+        "structured_outputs": structured_output_stats()
+    }
+
+@router.get("/model-stats")
+async def get_model_stats(
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    # Configured routes and observed latency per model for this worker
+    return {
+        "routes": ROUTES,
+        "models": model_health.snapshot()
+    }
+
+@router.post("/profiles/token")
+async def create_profiling_token(
+    minutes: int = 10,
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    # Send as the X-Profile header (or __profile query parameter) on the request to profile
+    return create_profile_token(minutes)
+
+@router.get("/profiles")
+async def get_profiles(
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    return list_profiles()
+
+@router.get("/profiles/{name}")
+async def get_profile(
+    name: str,
+    format: str = "text",
+    sort: str = "cumulative",
+    limit: int = 50,
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    path = profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "prof":
+        # Raw pstats dump for snakeviz / python -m pstats
+        return FileResponse(path, media_type="application/octet-stream", filename=name)
+    if sort not in ("cumulative", "tottime", "ncalls", "time"):
+        raise HTTPException(status_code=400, detail="sort must be one of: cumulative, tottime, ncalls, time")
+    return PlainTextResponse(profile_summary(path, sort, limit))
+
+@router.get("/analytics/funnel")
+async def get_funnel(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    # All users; defaults to the last 90 days so the range scan stays bounded
+    since = since or datetime.utcnow() - timedelta(days=90)
+    return funnel(db, None, since, until)
+
+@router.get("/analytics/time-in-stage")
+async def get_time_in_stage(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    since = since or datetime.utcnow() - timedelta(days=90)
+    return time_in_stage(db, None, since, until)
+
+@router.get("/llm-usage")
+async def get_llm_usage(
+    days: int = 7,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    # Per task: calls, tokens, cost, failure rate and p50/p95 latency from the usage ledger
+    return task_rollup(db, datetime.utcnow() - timedelta(days=days))
+
+@router.get("/llm-usage/top-users")
+async def get_llm_top_users(
+    days: int = 7,
+    limit: int = 20,
+    order_by: str = "cost",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    if order_by not in ("cost", "tokens", "calls", "latency"):
+        raise HTTPException(status_code=400, detail="order_by must be one of: cost, tokens, calls, latency")
+    return top_users(db, datetime.utcnow() - timedelta(days=days), min(limit, 100), order_by)
+
+@router.get("/reanalysis-jobs")
+async def get_reanalysis_jobs(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    jobs = db.query(ReanalysisJob).order_by(ReanalysisJob.id.desc()).limit(20).all()
+    return {
+        "stale_resumes": stale_count(db),
+        "jobs": [job_progress(job) for job in jobs]
+    }
+
+@router.post("/reanalysis-jobs")
+async def create_reanalysis_job(
+    max_resumes: int = BATCH_MAX_REQUESTS,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    # Re-analyses resumes from an older prompt version through the Batch API,
+    # in the background; poll GET /admin/reanalysis-jobs/{id} for progress
+    try:
+        job = create_job(db, max(max_resumes, 1), current_user.id)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    start_job_thread(job.id)
+    return job_progress(job)
+
+@router.get("/reanalysis-jobs/{job_id}")
+async def get_reanalysis_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    job = db.get(ReanalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_progress(job)
+
+@router.post("/reanalysis-jobs/{job_id}/resume")
+async def resume_reanalysis_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to access admin features")
+    
+    job = db.get(ReanalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    # Continues from the job's last committed step; a worker still holding the lease keeps it
+    start_job_thread(job.id)
+    return job_progress(job)
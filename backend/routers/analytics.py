@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from database import get_read_db
+from models import User
+from routers.auth import get_current_user
+from status_history import funnel, time_in_stage
+from datetime import datetime
+from typing import Optional
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+@router.get("/funnel")
+async def get_funnel(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    return funnel(db, current_user.id, since, until)
+
+
+@router.get("/time-in-stage")
+async def get_time_in_stage(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    return time_in_stage(db, current_user.id, since, until)
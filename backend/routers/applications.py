@@ -1,18 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException, Form, status
-from sqlalchemy.orm import Session
-from database import get_db
-from models import User, Application, Resume, CoverLetter
+from fastapi import APIRouter, Depends, HTTPException, Form, Query, status
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from database import get_db, get_read_db
+from models import User, Application, Resume, CoverLetter, Company
 from config import settings
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime
 from jose import JWTError, jwt
-from routers.auth import get_current_user
-from datetime import date
+from routers.auth import get_current_user, load_user
+from companies import normalize_name, resolve_company
+from status_history import record_status_change
+from archive import cover_letter_bodies, get_archived_application, list_archived_applications
+from datetime import date, timedelta
+from typing import List, Optional
 
 router = APIRouter(prefix="/applications", tags=["Applications"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 ALGORITHM = "HS256"
 
+EXPANDABLE = {
+    "resume": Application.resume,
+    "cover_letter": Application.cover_letter,
+    "company": Application.company,
+}
+
+# Sort keys map to (user_id, ...) indexes; "-" prefix sorts descending
+SORT_COLUMNS = {
+    "created_at": Application.created_at,
+    "application_deadline": Application.application_deadline,
+    "status": Application.status,
+    "company_name": Application.company_name,
+}
+
+def parse_sort(sort: str) -> list:
+    key = sort.lstrip("-")
+    if key not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)} (prefix - for descending)")
+    column = SORT_COLUMNS[key]
+    if sort.startswith("-"):
+        return [column.desc(), Application.id.desc()]
+    return [column.asc(), Application.id.asc()]
+
+def parse_expand(expand: str = None) -> list:
+    if not expand:
+        return []
+    fields = [f.strip() for f in expand.split(",") if f.strip()]
+    invalid = [f for f in fields if f not in EXPANDABLE]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"expand must be a subset of: {', '.join(EXPANDABLE)}")
+    return fields
+
+def expand_options(fields: list, many: bool = False) -> list:
+    # joinedload keeps a detail fetch to one query; lists use selectinload so each
+    # relation costs one extra IN query instead of widening every row
+    loader = selectinload if many else joinedload
+    return [loader(EXPANDABLE[f]) for f in fields]
+
+def serialize_expanded(application: Application, fields: list, bodies: dict = None) -> dict:
+    data = {}
+    if "resume" in fields:
+        resume = application.resume
+        data["resume"] = {
+            "id": resume.id,
+            "file_name": resume.file_name,
+            "created_at": resume.created_at
+        } if resume else None
+    if "cover_letter" in fields:
+        cl = application.cover_letter
+        body = (bodies or {}).get(cl.id, {}) if cl else {}
+        data["cover_letter"] = {
+            "id": cl.id,
+            "tone": cl.tone,
+            "content": body.get("content", cl.content),
+            "job_description": body.get("job_description", cl.job_description),
+            "created_at": cl.created_at
+        } if cl else None
+    if "company" in fields:
+        company = application.company
+        data["company"] = {
+            "id": company.id,
+            "name": company.name,
+            "website": company.website,
+            "industry": company.industry
+        } if company else None
+    return data
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -36,7 +108,7 @@ async def get_current_user(
     except ValueError:
         raise creds_exc
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = load_user(db, user_id)
     if not user:
         raise creds_exc
     return user
@@ -77,6 +149,7 @@ async def create_application(
         user_id=current_user.id,
         resume_id=resume_id,
         cover_letter_id=cover_letter_id,
+        company_id=resolve_company(db, company_name),
         company_name=company_name,
         position=position,
         job_url=job_url,
@@ -86,6 +159,8 @@ async def create_application(
     )
     
     db.add(application)
+    db.flush()
+    record_status_change(db, application, None, application.status)
     db.commit()
     db.refresh(application)
     
@@ -99,43 +174,163 @@ async def create_application(
 
 @router.get("/")
 async def list_applications(
-    status: str = None,
+    status: Optional[List[str]] = Query(None),
+    company: str = None,
+    created_from: date = None,
+    created_to: date = None,
+    deadline_from: date = None,
+    deadline_to: date = None,
+    has_cover_letter: bool = None,
+    sort: str = "-created_at",
+    limit: int = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    facets: bool = False,
+    expand: str = None,
+    include_archived: bool = False,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(Application).filter(Application.user_id == current_user.id)
-    
-    if status:
-        query = query.filter(Application.status == status)
-    
+    fields = parse_expand(expand)
+    statuses = [s for value in status or [] for s in value.split(",") if s]
+    order = parse_sort(sort)
+    if include_archived:
+        # Archived rows keep only summary columns and live in another table, so
+        # they can't take part in deadline/cover letter filters, SQL paging or
+        # the facet counts
+        unsupported = [name for name, value in (
+            ("deadline_from", deadline_from), ("deadline_to", deadline_to),
+            ("has_cover_letter", has_cover_letter is not None), ("limit", limit), ("offset", offset),
+            ("facets", facets), ("sort=application_deadline", sort.lstrip("-") == "application_deadline"),
+        ) if value]
+        if unsupported:
+            raise HTTPException(status_code=400,
+                                detail=f"include_archived can't be combined with: {', '.join(unsupported)}")
+
+    # Filters other than status/company; those two are applied separately so the
+    # facet query can count each one against the other
+    base = [Application.user_id == current_user.id]
+    if created_from:
+        base.append(Application.created_at >= created_from)
+    if created_to:
+        base.append(Application.created_at < created_to + timedelta(days=1))
+    if deadline_from:
+        base.append(Application.application_deadline >= deadline_from)
+    if deadline_to:
+        base.append(Application.application_deadline < deadline_to + timedelta(days=1))
+    if has_cover_letter is not None:
+        base.append(Application.cover_letter_id.isnot(None) if has_cover_letter
+                    else Application.cover_letter_id.is_(None))
+    selected = list(base)
+    if statuses:
+        selected.append(Application.status.in_(statuses))
+    # Spellings of one company share its company_id; the raw name only matters
+    # for rows that were never resolved to a company
+    company_id = db.query(Company.id).filter(
+        Company.normalized_name == normalize_name(company)
+    ).scalar() if company else None
+    if company:
+        unresolved = and_(Application.company_id.is_(None), Application.company_name == company)
+        selected.append(or_(Application.company_id == company_id, unresolved) if company_id else unresolved)
+
+    query = db.query(Application).filter(*selected).options(*expand_options(fields, many=True))
+    query = query.order_by(*order)
+    if limit:
+        query = query.offset(offset).limit(limit)
     applications = query.all()
+    bodies = cover_letter_bodies(db, [a.cover_letter for a in applications]) if "cover_letter" in fields else None
     
-    return [
+    results = [
         {
             "id": app.id,
             "company_name": app.company_name,
             "position": app.position,
             "status": app.status,
             "application_deadline": app.application_deadline,
-            "created_at": app.created_at
+            "created_at": app.created_at,
+            "cover_letter_id": app.cover_letter_id,
+            **serialize_expanded(app, fields, bodies)
         }
         for app in applications
     ]
+    
+    if include_archived:
+        results.extend(
+            {
+                "id": archived.id,
+                "company_name": archived.company_name,
+                "position": archived.position,
+                "status": archived.status,
+                "created_at": archived.created_at,
+                "archived": True
+            }
+            for archived in list_archived_applications(
+                db, current_user.id, statuses, company, created_from,
+                created_to + timedelta(days=1) if created_to else None
+            )
+        )
+        # Merge into the requested order; NULLs sort last ascending, as on Postgres
+        key = sort.lstrip("-")
+        results.sort(key=lambda row: (row[key] is None, row[key] if row[key] is not None else 0, row["id"]),
+                     reverse=sort.startswith("-"))
+    
+    if not facets:
+        return results
+
+    # One grouped query serves both facets and the total: each facet counts the
+    # rows matching every filter except its own, so chips show what selecting
+    # them would return
+    # Company chips are keyed by the company's canonical name, or by the raw name
+    # when company_id is NULL
+    label = func.coalesce(Company.name, Application.company_name)
+    by_status, by_company, total = {}, {}, 0
+    for row_status, row_company_id, row_company, count in db.query(
+        Application.status, Application.company_id, label, func.count(Application.id)
+    ).outerjoin(Company, Company.id == Application.company_id).filter(*base).group_by(
+        Application.status, Application.company_id, label
+    ):
+        status_match = not statuses or row_status in statuses
+        company_match = not company or (
+            row_company_id == company_id if row_company_id is not None else row_company == company
+        )
+        if company_match:
+            by_status[row_status] = by_status.get(row_status, 0) + count
+        if status_match:
+            by_company[row_company] = by_company.get(row_company, 0) + count
+        if status_match and company_match:
+            total += count
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "results": results,
+        "facets": {
+            "status": by_status,
+            "company": dict(sorted(by_company.items(), key=lambda item: (-item[1], item[0]))),
+        },
+    }
 
 @router.get("/{application_id}")
 async def get_application(
     application_id: int,
+    expand: str = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    application = db.query(Application).filter(
+    fields = parse_expand(expand)
+    application = db.query(Application).options(*expand_options(fields)).filter(
         Application.id == application_id,
         Application.user_id == current_user.id
     ).first()
     
     if not application:
+        # Closed applications may have been moved to cold storage
+        archived = get_archived_application(db, current_user.id, application_id)
+        if archived:
+            return {**archived, "archived": True}
         raise HTTPException(status_code=404, detail="Application not found")
     
+    bodies = cover_letter_bodies(db, [application.cover_letter]) if "cover_letter" in fields else None
+    
     return {
         "id": application.id,
         "company_name": application.company_name,
@@ -147,7 +342,8 @@ async def get_application(
         "resume_id": application.resume_id,
         "cover_letter_id": application.cover_letter_id,
         "created_at": application.created_at,
-        "updated_at": application.updated_at
+        "updated_at": application.updated_at,
+        **serialize_expanded(application, fields, bodies)
     }
 
 @router.patch("/{application_id}")
@@ -170,6 +366,8 @@ async def update_application(
         valid_statuses = ["draft", "applied", "interview", "offer", "rejected", "accepted"]
         if status not in valid_statuses:
             raise HTTPException(status_code=400, detail=f"Status must be one of: {', '.join(valid_statuses)}")
+        # Logged in the same transaction as the change
+        record_status_change(db, application, application.status, status)
         application.status = status
     
     if notes is not None:
@@ -1,8 +1,11 @@
+import os
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from database import get_db
 from models import User
+from invalidation import InvalidatingCache
 from config import settings
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -15,6 +18,9 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
+# Column snapshots of authenticated users, dropped on every write to the user
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "600"))
+user_cache = InvalidatingCache("users", kinds=["user"], ttl=USER_CACHE_TTL_SECONDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +28,19 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def load_user(db: Session, user_id: int) -> Optional[User]:
+    """The user row, served from user_cache when possible."""
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        # Attach without a SELECT; lazy relationships still load on demand
+        return db.merge(user, load=False)
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        user_cache.set(user_id, {c.key: getattr(user, c.key) for c in inspect(User).column_attrs})
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
@@ -51,7 +70,7 @@ async def get_current_user(
     except ValueError:
         raise creds_exc
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = load_user(db, user_id)
     if not user:
         raise creds_exc
     return user
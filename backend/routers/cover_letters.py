@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Form, status
+from fastapi import APIRouter, Depends, HTTPException, Form, Response, status
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_read_db
 from models import User, CoverLetter, Resume
 from config import settings
 from fastapi.security import OAuth2PasswordBearer
 from openai import AsyncOpenAI
 import json
 from jose import JWTError, jwt
-from routers.auth import get_current_user
+from routers.auth import get_current_user, load_user
+from archive import cover_letter_bodies, restore_cover_letter
+from resume_versions import resume_text
+from model_router import create_completion
+from cover_letter_export import EXPORT_FORMATS, TEMPLATES, export_cover_letter
 
 router = APIRouter(prefix="/cover-letters", tags=["Cover Letters"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
@@ -36,12 +40,12 @@ async def get_current_user(
     except ValueError:
         raise creds_exc
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = load_user(db, user_id)
     if not user:
         raise creds_exc
     return user
 
-async def generate_cover_letter(resume_text: str, job_description: str, tone: str) -> str:
+async def generate_cover_letter(resume_text: str, job_description: str, tone: str, user_id: int = None) -> str:
     client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
     prompt = f"""Generate a professional cover letter based on the following resume and job description.
     The tone should be {tone}.
@@ -58,10 +62,9 @@ async def generate_cover_letter(resume_text: str, job_description: str, tone: st
     3. Demonstrates understanding of the company's needs
     4. Maintains a {tone} tone throughout
     """
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
+    response = await create_completion(
+        client, "cover_letter", user_id,
+        messages=[{"role": "user", "content": prompt}]
     )
     content = response.choices[0].message.content
     return content
@@ -90,9 +93,10 @@ async def create_cover_letter(
     
     # Generate cover letter
     cover_letter_text = await generate_cover_letter(
-        resume.parsed_data["text"],
+        resume_text(db, resume),
         job_description,
-        tone
+        tone,
+        current_user.id
     )
     
     # Create cover letter record
@@ -118,17 +122,18 @@ async def create_cover_letter(
 @router.get("/")
 async def list_cover_letters(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     cover_letters = db.query(CoverLetter).filter(CoverLetter.user_id == current_user.id).all()
+    bodies = cover_letter_bodies(db, cover_letters)
     return [
         {
             "id": cl.id,
             "tone": cl.tone,
             "created_at": cl.created_at,
             "resume_id": cl.resume_id,
-            "job_description": cl.job_description,
-            "content": cl.content
+            "job_description": bodies[cl.id]["job_description"],
+            "content": bodies[cl.id]["content"]
         }
         for cl in cover_letters
     ]
@@ -138,7 +143,7 @@ async def list_cover_letters(
 async def get_cover_letter(
     cover_letter_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     cover_letter = db.query(CoverLetter).filter(
         CoverLetter.id == cover_letter_id,
@@ -148,15 +153,50 @@ async def get_cover_letter(
     if not cover_letter:
         raise HTTPException(status_code=404, detail="Cover letter not found")
     
+    body = cover_letter_bodies(db, [cover_letter])[cover_letter.id]
+    
     return {
         "id": cover_letter.id,
-        "content": cover_letter.content,
+        "content": body["content"],
         "tone": cover_letter.tone,
-        "job_description": cover_letter.job_description,
+        "job_description": body["job_description"],
         "created_at": cover_letter.created_at,
         "resume_id": cover_letter.resume_id
     }
 
+@router.get("/{cover_letter_id}/export")
+async def export_cover_letter_file(
+    cover_letter_id: int,
+    format: str = "pdf",
+    template: str = "classic",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if template not in TEMPLATES:
+        raise HTTPException(status_code=400, detail=f"Template must be one of: {', '.join(TEMPLATES)}")
+    
+    cover_letter = db.query(CoverLetter).filter(
+        CoverLetter.id == cover_letter_id,
+        CoverLetter.user_id == current_user.id
+    ).first()
+    
+    if not cover_letter:
+        raise HTTPException(status_code=404, detail="Cover letter not found")
+    
+    content = cover_letter_bodies(db, [cover_letter])[cover_letter.id]["content"]
+    data, cache_hit = await export_cover_letter(content, template, format)
+    
+    return Response(
+        content=data,
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="cover-letter-{cover_letter.id}.{format}"',
+            "X-Export-Cache": "hit" if cache_hit else "miss",
+        }
+    )
+
 @router.post("/{cover_letter_id}/regenerate")
 async def regenerate_cover_letter(
     cover_letter_id: int,
@@ -174,11 +214,15 @@ async def regenerate_cover_letter(
     
     resume = db.query(Resume).filter(Resume.id == cover_letter.resume_id).first()
     
+    # Regenerating makes the letter hot again
+    restore_cover_letter(db, cover_letter)
+    
     # Generate new cover letter
     new_content = await generate_cover_letter(
-        resume.parsed_data["text"],
+        resume_text(db, resume),
         cover_letter.job_description,
-        tone
+        tone,
+        current_user.id
     )
     
     # Update cover letter
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import get_read_db
+from models import User, Application, Resume, CoverLetter, ArchivedApplication
+from routers.auth import get_current_user
+from invalidation import InvalidatingCache
+from datetime import datetime, timezone
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+# Applications in these states no longer have a deadline worth showing
+CLOSED_STATUSES = ("rejected", "accepted")
+# Per-user summaries, dropped whenever one of the user's records changes; the
+# TTL only bounds how long "upcoming" deadlines can lag the clock
+summary_cache = InvalidatingCache(
+    "dashboard_summary", kinds=["resume", "application", "cover_letter"], ttl=60, key="user_id"
+)
+
+
+@router.get("/summary")
+async def dashboard_summary(
+    recent: int = Query(5, ge=1, le=20),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    cached = summary_cache.get(current_user.id) or {}
+    if recent in cached:
+        return cached[recent]
+
+    # Counts and short lists only: each query below is served by a (user_id, ...)
+    # index and none of them loads resume text or cover letter bodies
+    by_status = dict(
+        db.query(Application.status, func.count(Application.id))
+        .filter(Application.user_id == current_user.id)
+        .group_by(Application.status)
+        .all()
+    )
+    archived = db.query(func.count(ArchivedApplication.id)).filter(
+        ArchivedApplication.user_id == current_user.id
+    ).scalar()
+    resume_count = db.query(func.count(Resume.id)).filter(Resume.user_id == current_user.id).scalar()
+    cover_letter_count = db.query(func.count(CoverLetter.id)).filter(CoverLetter.user_id == current_user.id).scalar()
+
+    recent_applications = db.query(
+        Application.id, Application.company_name, Application.position,
+        Application.status, Application.application_deadline, Application.created_at
+    ).filter(
+        Application.user_id == current_user.id
+    ).order_by(Application.created_at.desc(), Application.id.desc()).limit(recent).all()
+
+    recent_resumes = db.query(Resume.id, Resume.file_name, Resume.created_at).filter(
+        Resume.user_id == current_user.id
+    ).order_by(Resume.created_at.desc(), Resume.id.desc()).limit(recent).all()
+
+    recent_cover_letters = db.query(
+        CoverLetter.id, CoverLetter.resume_id, CoverLetter.tone, CoverLetter.created_at
+    ).filter(
+        CoverLetter.user_id == current_user.id
+    ).order_by(CoverLetter.created_at.desc(), CoverLetter.id.desc()).limit(recent).all()
+
+    upcoming = db.query(
+        Application.id, Application.company_name, Application.position,
+        Application.status, Application.application_deadline
+    ).filter(
+        Application.user_id == current_user.id,
+        # Deadlines are stored as midnight dates; one due today is still upcoming
+        Application.application_deadline >= datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ),
+        Application.status.notin_(CLOSED_STATUSES)
+    ).order_by(Application.application_deadline.asc()).limit(recent).all()
+
+    summary = {
+        "applications": {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "archived": archived,
+        },
+        "resumes": resume_count,
+        "cover_letters": cover_letter_count,
+        "recent_applications": [dict(row._mapping) for row in recent_applications],
+        "recent_resumes": [dict(row._mapping) for row in recent_resumes],
+        "recent_cover_letters": [dict(row._mapping) for row in recent_cover_letters],
+        "upcoming_deadlines": [dict(row._mapping) for row in upcoming],
+    }
+    # A lagging replica may predate an invalidation this worker already applied,
+    # so only primary reads are cached
+    if not db.info.get("replica"):
+        summary_cache.set(current_user.id, {**cached, recent: summary})
+    return summary
@@ -1,18 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_read_db
 from models import User, Resume
 from config import settings
 from fastapi.security import OAuth2PasswordBearer
 import os
-import json
 from datetime import datetime
 from openai import AsyncOpenAI
-from PyPDF2 import PdfReader
-from docx import Document
 import shutil
 from jose import JWTError, jwt
-from routers.auth import get_current_user
+from routers.auth import get_current_user, load_user
+from resume_parser import split_sections
+from resume_versions import (add_version, diff_versions, find_previous, merge_section_feedback,
+                             resume_text, resume_texts, reusable_feedback, section_hashes)
+from document_text import extract_text_from_pdf, extract_text_from_docx
+from llm_json import structured_completion, resume_sections_schema, JOB_MATCH_SCHEMA
+from llm_usage import usage_ledger
+from model_router import route_for
+from resume_analysis import RESUME_ANALYSIS_PROMPT_VERSION, resume_analysis_prompt
 
 router = APIRouter(prefix="/resumes", tags=["Resumes"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
@@ -44,50 +49,35 @@ async def get_current_user(
     except ValueError:
         raise creds_exc
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = load_user(db, user_id)
     if not user:
         raise creds_exc
     return user
 
-def extract_text_from_pdf(file_path: str) -> str:
-    with open(file_path, 'rb') as file:
-        pdf = PdfReader(file)
-        text = ""
-        for page in pdf.pages:
-            text += page.extract_text()
-    return text
-
-def extract_text_from_docx(file_path: str) -> str:
-    doc = Document(file_path)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
-
-async def analyze_resume_with_ai(text: str) -> dict:
-    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    prompt = f"""Analyze this resume and provide feedback in JSON format with the following structure:
-    {{
-        \"missing_sections\": [\"list of missing important sections\"],
-        \"formatting_issues\": [\"list of formatting issues\"],
-        \"content_suggestions\": [\"list of suggestions to improve content\"],
-        \"strengths\": [\"list of resume strengths\"],
-        \"weaknesses\": [\"list of resume weaknesses\"]
-    }}
+async def analyze_resume_with_ai(text: str, user_id: int = None, previous_feedback: dict = None) -> dict:
+    """Per-section feedback, asking the model only about sections that changed
+    since ``previous_feedback`` (the previous version's ai_feedback)."""
+    sections = split_sections(text)
+    hashes = section_hashes(sections)
+    by_section = reusable_feedback(hashes, previous_feedback)
+    changed = [name for name in sections if name not in by_section]
     
-    Resume text:
-    {text}
-    """
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-    return json.loads(response.choices[0].message.content)
+    if changed:
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        by_section.update(await structured_completion(
+            client, "resume_analysis", resume_analysis_prompt(sections, changed),
+            resume_sections_schema(changed), user_id
+        ))
+    elif by_section:
+        # Every section reused from the previous version: no model call
+        usage_ledger.record("resume_analysis", route_for("resume_analysis")["model"], "ok", 0.0,
+                            user_id, cache_hit=True)
+    return merge_section_feedback(sections, hashes, by_section)
 
 @router.post("/upload")
 async def upload_resume(
     file: UploadFile = File(...),
+    document_id: int = Form(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -105,38 +95,45 @@ async def upload_resume(
     else:
         text = extract_text_from_docx(file_path)
     
-    # Analyze with AI
-    ai_feedback = await analyze_resume_with_ai(text)
+    # A revision of an existing resume becomes its next version
+    try:
+        document, previous = find_previous(db, current_user.id, file.filename, text, document_id)
+    except LookupError:
+        os.remove(file_path)
+        raise HTTPException(status_code=404, detail="Resume document not found")
     
-    # Create resume record
-    resume = Resume(
-        user_id=current_user.id,
-        file_path=file_path,
-        file_name=file.filename,
-        parsed_data={"text": text},
-        ai_feedback=ai_feedback
+    # Unchanged sections reuse the previous version's feedback, unless it came from an older prompt
+    reuse = previous is not None and previous.analysis_version == RESUME_ANALYSIS_PROMPT_VERSION
+    ai_feedback = await analyze_resume_with_ai(
+        text, current_user.id, previous.ai_feedback if reuse else None
     )
     
-    db.add(resume)
+    resume = add_version(db, current_user.id, file.filename, file_path, text, document, previous)
+    resume.ai_feedback = ai_feedback
+    resume.analysis_version = RESUME_ANALYSIS_PROMPT_VERSION
     db.commit()
     db.refresh(resume)
     
     return {
         "id": resume.id,
         "file_name": resume.file_name,
+        "document_id": resume.document_id,
+        "version": resume.version,
         "ai_feedback": resume.ai_feedback
     }
 
 @router.get("/")
 async def list_resumes(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     resumes = db.query(Resume).filter(Resume.user_id == current_user.id).all()
     return [
         {
             "id": resume.id,
             "file_name": resume.file_name,
+            "document_id": resume.document_id,
+            "version": resume.version,
             "created_at": resume.created_at,
             "ai_feedback": resume.ai_feedback
         }
@@ -147,7 +144,7 @@ async def list_resumes(
 async def get_resume(
     resume_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     resume = db.query(Resume).filter(
         Resume.id == resume_id,
@@ -160,11 +157,105 @@ async def get_resume(
     return {
         "id": resume.id,
         "file_name": resume.file_name,
+        "document_id": resume.document_id,
+        "version": resume.version,
         "created_at": resume.created_at,
-        "parsed_data": resume.parsed_data,
+        "parsed_data": {**(resume.parsed_data or {}), "text": resume_text(db, resume)},
         "ai_feedback": resume.ai_feedback
     }
 
+@router.get("/{resume_id}/sections")
+async def get_resume_sections(
+    resume_id: int,
+    names: str = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    resume = db.query(Resume).filter(
+        Resume.id == resume_id,
+        Resume.user_id == current_user.id
+    ).first()
+    
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    data = resume.parsed_data or {}
+    structured = {k: v for k, v in data.items() if k not in ("text", "sections")}
+    if names:
+        wanted = [n.strip() for n in names.split(",") if n.strip()]
+        structured = {k: structured.get(k) for k in wanted}
+    return structured
+
+@router.get("/{resume_id}/versions")
+async def list_resume_versions(
+    resume_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    resume = db.query(Resume).filter(
+        Resume.id == resume_id,
+        Resume.user_id == current_user.id
+    ).first()
+    
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    if resume.document_id is None:
+        versions = [resume]
+    else:
+        versions = db.query(Resume).filter(
+            Resume.document_id == resume.document_id
+        ).order_by(Resume.version).all()
+    
+    return [
+        {
+            "id": version.id,
+            "version": version.version,
+            "file_name": version.file_name,
+            "created_at": version.created_at
+        }
+        for version in versions
+    ]
+
+@router.get("/{resume_id}/diff")
+async def diff_resume_versions(
+    resume_id: int,
+    against: int = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    resume = db.query(Resume).filter(
+        Resume.id == resume_id,
+        Resume.user_id == current_user.id
+    ).first()
+    
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    # Defaults to the version before this one
+    if against is not None:
+        other = db.query(Resume).filter(
+            Resume.id == against,
+            Resume.user_id == current_user.id
+        ).first()
+    elif resume.document_id is not None:
+        other = db.query(Resume).filter(
+            Resume.document_id == resume.document_id,
+            Resume.version < resume.version
+        ).order_by(Resume.version.desc()).first()
+    else:
+        other = None
+    
+    if not other:
+        raise HTTPException(status_code=404, detail="No version to compare against")
+    
+    texts = resume_texts(db, [other, resume])
+    return {
+        "from": {"id": other.id, "version": other.version},
+        "to": {"id": resume.id, "version": resume.version},
+        **diff_versions(texts[other.id], texts[resume.id])
+    }
+
 @router.post("/{resume_id}/analyze-job")
 async def analyze_resume_for_job(
     resume_id: int,
@@ -181,23 +272,13 @@ async def analyze_resume_for_job(
         raise HTTPException(status_code=404, detail="Resume not found")
     
     client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    prompt = f"""Compare this resume with the job description and provide a matching score and feedback in JSON format:
-    {{
-        \"match_score\": \"percentage match\",
-        \"missing_skills\": [\"list of missing required skills\"],
-        \"matching_skills\": [\"list of matching skills\"],
-        \"suggestions\": [\"list of suggestions to improve match\"]
-    }}
+    prompt = f"""Compare this resume with the job description. Give a percentage match score,
+    the required skills that are missing, the skills that match, and suggestions to improve the match.
     
     Resume text:
-    {resume.parsed_data['text']}
+    {resume_text(db, resume)}
     
     Job Description:
     {job_description}
     """
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-    return json.loads(response.choices[0].message.content) 
\ No newline at end of file
+    return await structured_completion(client, "job_match", prompt, JOB_MATCH_SCHEMA, current_user.id)
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from database import get_read_db
+from models import User, Application, CoverLetter
+from routers.auth import get_current_user
+from search_index import SEARCH_KINDS, search_documents
+from typing import List, Optional
+import re
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+SNIPPET_CHARS = 160
+
+
+def _snippet(texts, q: str) -> str:
+    terms = [t.lower() for t in re.findall(r"\w+", q)]
+    for body in texts:
+        if not body:
+            continue
+        lowered = body.lower()
+        for term in terms:
+            pos = lowered.find(term)
+            if pos != -1:
+                start = max(pos - SNIPPET_CHARS // 2, 0)
+                snippet = body[start:start + SNIPPET_CHARS].strip()
+                return ("…" if start > 0 else "") + snippet + ("…" if start + SNIPPET_CHARS < len(body) else "")
+    first = next((t for t in texts if t), "")
+    return first[:SNIPPET_CHARS]
+
+
+@router.get("/")
+async def search(
+    q: str = Query(..., min_length=1),
+    kind: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    if kind:
+        invalid = [k for k in kind if k not in SEARCH_KINDS]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Kind must be one of: {', '.join(SEARCH_KINDS)}")
+
+    total, hits = search_documents(db, current_user.id, q, kinds=kind, limit=limit, offset=offset)
+
+    # Hydrate the page of hits with one query per kind
+    app_ids = [ref_id for k, ref_id, _ in hits if k == "application"]
+    cl_ids = [ref_id for k, ref_id, _ in hits if k == "cover_letter"]
+    applications = {
+        a.id: a for a in db.query(Application).filter(Application.id.in_(app_ids)).all()
+    } if app_ids else {}
+    cover_letters = {
+        cl.id: cl for cl in db.query(CoverLetter).filter(CoverLetter.id.in_(cl_ids)).all()
+    } if cl_ids else {}
+
+    results = []
+    for k, ref_id, score in hits:
+        if k == "application" and ref_id in applications:
+            app = applications[ref_id]
+            results.append({
+                "kind": k,
+                "id": app.id,
+                "score": score,
+                "title": f"{app.position} at {app.company_name}",
+                "status": app.status,
+                "snippet": _snippet([app.notes, app.position, app.company_name], q),
+                "created_at": app.created_at
+            })
+        elif k == "cover_letter" and ref_id in cover_letters:
+            cl = cover_letters[ref_id]
+            results.append({
+                "kind": k,
+                "id": cl.id,
+                "score": score,
+                "title": f"Cover letter ({cl.tone})",
+                "resume_id": cl.resume_id,
+                "snippet": _snippet([cl.content, cl.job_description], q),
+                "created_at": cl.created_at
+            })
+
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "results": results
+    }
@@ -0,0 +1,133 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Searchable text per table. Order matters for the SQLite FTS5 column layout.
+SEARCH_FIELDS = {
+    "applications": ("company_name", "position", "notes"),
+    "cover_letters": ("job_description", "content"),
+}
+
+SEARCH_KINDS = {
+    "application": "applications",
+    "cover_letter": "cover_letters",
+}
+
+
+def _pg_document(table: str) -> str:
+    # Must match the GIN expression index exactly so the planner can use it
+    parts = " || ' ' || ".join(f"coalesce({col}, '')" for col in SEARCH_FIELDS[table])
+    return f"to_tsvector('english', {parts})"
+
+
+def _setup_postgres(conn):
+    for table in SEARCH_FIELDS:
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_search "
+            f"ON {table} USING GIN ({_pg_document(table)})"
+        ))
+
+
+def _setup_sqlite(conn):
+    for table, cols in SEARCH_FIELDS.items():
+        fts = f"{table}_fts"
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts},
+        ).first()
+        col_list = ", ".join(cols)
+        new_values = ", ".join(f"new.{c}" for c in cols)
+        old_values = ", ".join(f"old.{c}" for c in cols)
+
+        # External-content FTS5 table kept in sync by triggers, so every write
+        # path (ORM, raw SQL, bulk loads) updates the index in the same transaction.
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+            f"USING fts5({col_list}, content='{table}', content_rowid='id')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_values}); END"
+        ))
+        if not exists:
+            # Index rows written before the FTS table existed
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def ensure_search_schema(engine: Engine):
+    """Create the full-text indexes (GIN on Postgres, FTS5 on SQLite). Idempotent."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            _setup_postgres(conn)
+        elif engine.dialect.name == "sqlite":
+            _setup_sqlite(conn)
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input can't inject FTS5 operators; prefix-match each
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _postgres_branches(tables):
+    branches = []
+    for table in tables:
+        kind = next(k for k, t in SEARCH_KINDS.items() if t == table)
+        doc = _pg_document(table)
+        branches.append(
+            f"SELECT '{kind}' AS kind, id, ts_rank({doc}, query) AS score "
+            f"FROM {table}, websearch_to_tsquery('english', :q) AS query "
+            f"WHERE user_id = :user_id AND {doc} @@ query"
+        )
+    return branches
+
+
+def _sqlite_branches(tables):
+    branches = []
+    for table in tables:
+        kind = next(k for k, t in SEARCH_KINDS.items() if t == table)
+        fts = f"{table}_fts"
+        # bm25() is lower-is-better; negate so both backends sort by score DESC
+        branches.append(
+            f"SELECT '{kind}' AS kind, t.id AS id, -bm25({fts}) AS score "
+            f"FROM {fts} JOIN {table} t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :q AND t.user_id = :user_id"
+        )
+    return branches
+
+
+def search_documents(db: Session, user_id: int, q: str, kinds=None, limit: int = 20, offset: int = 0):
+    """Ranked, paginated search over a user's applications and cover letters.
+
+    Returns ``(total, [(kind, id, score), ...])``.
+    """
+    tables = [SEARCH_KINDS[k] for k in (kinds or SEARCH_KINDS)]
+    dialect = db.bind.dialect.name
+
+    if dialect == "postgresql":
+        branches = _postgres_branches(tables)
+        params = {"q": q, "user_id": user_id}
+    else:
+        match = _fts5_query(q)
+        if not match:
+            return 0, []
+        branches = _sqlite_branches(tables)
+        params = {"q": match, "user_id": user_id}
+
+    union = " UNION ALL ".join(branches)
+    total = db.execute(text(f"SELECT count(*) FROM ({union}) AS hits"), params).scalar()
+    rows = db.execute(
+        text(f"SELECT kind, id, score FROM ({union}) AS hits ORDER BY score DESC, id DESC LIMIT :limit OFFSET :offset"),
+        {**params, "limit": limit, "offset": offset},
+    ).all()
+    return total, [(row.kind, row.id, float(row.score)) for row in rows]
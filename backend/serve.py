@@ -0,0 +1,81 @@
+# serve.py
+# Production launcher: sizes uvicorn workers from CPU count and splits a total
+# database connection budget across them before any worker imports database.py.
+#
+#   WEB_CONCURRENCY          worker count (default: 2 * CPUs + 1, capped by WEB_MAX_WORKERS)
+#   WEB_MAX_WORKERS          upper bound for the computed worker count (default 8)
+#   DB_MAX_CONNECTIONS       connections this deployment may hold on Postgres (default 20)
+#   DB_RESERVED_CONNECTIONS  kept free for migrations, psql, cron jobs (default 3)
+#   DB_PGBOUNCER=1           disable prepared statements for transaction pooling
+import math
+import os
+import uvicorn
+
+MIN_CONNECTIONS_PER_WORKER = 2
+# Held outside the pool by each worker: the cache invalidation LISTEN connection
+LISTENER_CONNECTIONS_PER_WORKER = 1
+
+
+def _int_env(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def worker_count() -> int:
+    explicit = _int_env("WEB_CONCURRENCY", 0)
+    if explicit > 0:
+        return explicit
+    cpus = os.cpu_count() or 1
+    return max(1, min(2 * cpus + 1, _int_env("WEB_MAX_WORKERS", 8)))
+
+
+def pool_plan(workers: int) -> dict:
+    """Split DB_MAX_CONNECTIONS across workers.
+
+    Returns the (possibly reduced) worker count and the per-worker pool_size and
+    max_overflow, so that ``workers * (pool_size + max_overflow + 1)`` never
+    exceeds the budget; the extra connection is each worker's invalidation listener.
+    """
+    budget = _int_env("DB_MAX_CONNECTIONS", 20) - _int_env("DB_RESERVED_CONNECTIONS", 3)
+    per_worker_min = MIN_CONNECTIONS_PER_WORKER + LISTENER_CONNECTIONS_PER_WORKER
+    budget = max(budget, per_worker_min)
+
+    # Rather than starving every worker, run fewer workers
+    workers = max(1, min(workers, budget // per_worker_min))
+    per_worker = budget // workers - LISTENER_CONNECTIONS_PER_WORKER
+    pool_size = math.ceil(per_worker / 2)
+    return {
+        "workers": workers,
+        "pool_size": pool_size,
+        "max_overflow": per_worker - pool_size,
+    }
+
+
+def main():
+    workers = worker_count()
+    url = (os.getenv("SQLALCHEMY_DATABASE_URL") or os.getenv("DATABASE_URL") or "").strip()
+
+    if not url.startswith("sqlite"):
+        plan = pool_plan(workers)
+        workers = plan["workers"]
+        # Explicit per-worker overrides win over the computed plan
+        os.environ.setdefault("DB_POOL_SIZE", str(plan["pool_size"]))
+        os.environ.setdefault("DB_MAX_OVERFLOW", str(plan["max_overflow"]))
+
+    print(
+        f"Starting {workers} worker(s); pool_size={os.getenv('DB_POOL_SIZE', 'default')} "
+        f"max_overflow={os.getenv('DB_MAX_OVERFLOW', 'default')} "
+        f"pgbouncer={os.getenv('DB_PGBOUNCER', '0')}"
+    )
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "*"),
+    )
+
+
+if __name__ == "__main__":
+    main()
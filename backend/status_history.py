@@ -0,0 +1,197 @@
+# status_history.py
+# Application status transitions and the funnel / time-in-stage analytics over them.
+#
+# Every status change appends a row to application_status_changes in the same
+# transaction as the change itself. The analytics are single SQL statements:
+# LEAD() over each application's transitions gives how long it sat in a stage,
+# and a running SUM() over the deepest stage reached gives the funnel, so the
+# database does the work on an indexed (user_id, changed_at) / (changed_at)
+# range instead of Python post-processing every row.
+#
+#   python status_history.py backfill [--batch-size 1000]
+import argparse
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from models import Application, ApplicationStatusChange
+
+# Forward path through the funnel; "rejected" (and "draft") are off the path
+FUNNEL_STAGES = ("applied", "interview", "offer", "accepted")
+
+
+def record_status_change(db: Session, application: Application, from_status, to_status: str):
+    """Append a transition; the caller commits it together with the status change."""
+    if from_status == to_status:
+        return
+    db.add(ApplicationStatusChange(
+        application_id=application.id,
+        user_id=application.user_id,
+        from_status=from_status,
+        to_status=to_status,
+        changed_at=datetime.utcnow(),
+    ))
+
+
+def _range_filter(user_id, since, until, params: dict) -> str:
+    clauses = []
+    if user_id is not None:
+        clauses.append("user_id = :user_id")
+        params["user_id"] = user_id
+    if since is not None:
+        clauses.append("changed_at >= :since")
+        params["since"] = since
+    if until is not None:
+        clauses.append("changed_at < :until")
+        params["until"] = until
+    return ("WHERE " + " AND ".join(clauses)) if clauses else ""
+
+
+def funnel(db: Session, user_id: int = None, since: datetime = None, until: datetime = None) -> dict:
+    """How many applications reached each stage, counting transitions in [since, until)."""
+    params = {}
+    where = _range_filter(user_id, since, until, params)
+    depth = " ".join(f"WHEN '{stage}' THEN {i + 1}" for i, stage in enumerate(FUNNEL_STAGES))
+    rows = db.execute(text(f"""
+        WITH reached AS (
+            SELECT application_id,
+                   MAX(CASE to_status {depth} ELSE 0 END) AS depth,
+                   MAX(CASE WHEN to_status = 'rejected' THEN 1 ELSE 0 END) AS rejected
+            FROM application_status_changes
+            {where}
+            GROUP BY application_id
+        ), per_depth AS (
+            SELECT depth, COUNT(*) AS applications, SUM(rejected) AS rejected
+            FROM reached
+            GROUP BY depth
+        )
+        SELECT depth, applications, rejected,
+               SUM(applications) OVER (ORDER BY depth DESC) AS reached_or_beyond
+        FROM per_depth
+        ORDER BY depth
+    """), params).all()
+
+    by_depth = {row.depth: row for row in rows}
+    stages = []
+    previous = None
+    for i, stage in enumerate(FUNNEL_STAGES):
+        # An application at depth d also passed through every earlier stage
+        reached = next((by_depth[d].reached_or_beyond for d in sorted(by_depth) if d >= i + 1), 0)
+        row = by_depth.get(i + 1)
+        stages.append({
+            "stage": stage,
+            "reached": int(reached or 0),
+            "rejected_here": int(row.rejected or 0) if row else 0,
+            "conversion_from_previous": round(reached / previous, 4) if previous else None,
+        })
+        previous = reached
+    return {
+        "applications": int(sum(row.applications for row in rows)),
+        "stages": stages,
+    }
+
+
+def _seconds_between(dialect: str, start: str, end: str) -> str:
+    if dialect == "postgresql":
+        return f"EXTRACT(EPOCH FROM ({end} - {start}))"
+    return f"(julianday({end}) - julianday({start})) * 86400.0"
+
+
+def time_in_stage(db: Session, user_id: int = None, since: datetime = None, until: datetime = None) -> list:
+    """Average/max time spent in each status, for stages entered in [since, until).
+
+    A stage's time runs until the application's next transition, which may fall
+    after ``until``; stages that are still current are reported as ``open``.
+    """
+    params = {}
+    where = _range_filter(user_id, since, until, params)
+    entered_in_range = _range_filter(None, since, until, params)
+    dialect = db.bind.dialect.name
+    duration = _seconds_between(dialect, "changed_at", "left_at")
+    # LEAD() needs each application's full history, so restrict to the
+    # applications with a transition in range, then window over all of theirs
+    rows = db.execute(text(f"""
+        WITH in_range AS (
+            SELECT DISTINCT application_id FROM application_status_changes {where}
+        ), spans AS (
+            SELECT c.to_status AS status, c.changed_at,
+                   LEAD(c.changed_at) OVER (
+                       PARTITION BY c.application_id ORDER BY c.changed_at, c.id
+                   ) AS left_at
+            FROM application_status_changes c
+            JOIN in_range r ON r.application_id = c.application_id
+        ), durations AS (
+            SELECT status, changed_at, left_at, {duration} AS seconds FROM spans
+        )
+        SELECT status,
+               COUNT(*) AS entered,
+               COUNT(left_at) AS completed,
+               COUNT(*) - COUNT(left_at) AS open,
+               AVG(seconds) AS avg_seconds,
+               MAX(seconds) AS max_seconds
+        FROM durations
+        {entered_in_range}
+        GROUP BY status
+        ORDER BY status
+    """), params).all()
+    return [
+        {
+            "status": row.status,
+            "entered": row.entered,
+            "completed": row.completed,
+            "open": row.open,
+            "avg_days": round(row.avg_seconds / 86400, 2) if row.avg_seconds is not None else None,
+            "max_days": round(row.max_seconds / 86400, 2) if row.max_seconds is not None else None,
+        }
+        for row in rows
+    ]
+
+
+def backfill(db: Session, batch_size: int = 1000) -> int:
+    """Seed one initial transition for applications that have no history yet.
+
+    Earlier transitions were never recorded, so the current status is logged
+    as of the application's creation time.
+    """
+    inserted = 0
+    last_id = 0
+    while True:
+        batch = db.query(Application.id, Application.user_id, Application.status, Application.created_at).filter(
+            Application.id > last_id,
+            ~db.query(ApplicationStatusChange.id).filter(
+                ApplicationStatusChange.application_id == Application.id
+            ).exists()
+        ).order_by(Application.id).limit(batch_size).all()
+        if not batch:
+            break
+        db.bulk_insert_mappings(ApplicationStatusChange, [
+            {
+                "application_id": row.id,
+                "user_id": row.user_id,
+                "from_status": None,
+                "to_status": row.status,
+                "changed_at": row.created_at or datetime.utcnow(),
+            }
+            for row in batch
+        ])
+        db.commit()
+        inserted += len(batch)
+        last_id = batch[-1].id
+        print(f"… up to application {last_id}: {inserted} seeded")
+    return inserted
+
+
+if __name__ == "__main__":
+    from database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Application status history tools")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = backfill(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"✅ Seeded history for {count} application(s)")
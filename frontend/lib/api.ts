@@ -3,8 +3,26 @@ import { ApiError } from './types';
 
 const api = axios.create({
   baseURL: `${process.env.NEXT_PUBLIC_API_URL}`,
+  // Send the API's cookies cross-origin (the read_primary_until pin among them)
+  withCredentials: true,
 });
 
+// After a write the API returns a signed X-Read-Primary-Until token; echoing it
+// keeps our next reads on the primary database even where cookies are blocked
+const READ_PRIMARY_HEADER = 'X-Read-Primary-Until';
+let readPrimaryToken: string | null = null;
+
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost);
+// getRandomValues is available everywhere, so build a v4 UUID from it
+const newIdempotencyKey = (): string => {
+  if (typeof crypto.randomUUID === 'function') return crypto.randomUUID();
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
 // Add a request interceptor to add the auth token
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token');
@@ -12,6 +30,20 @@ api.interceptors.request.use((config) => {
     config.headers = config.headers || {};
     config.headers.Authorization = `Bearer ${token}`;
   }
+  if (readPrimaryToken) {
+    config.headers = config.headers || {};
+    config.headers[READ_PRIMARY_HEADER] = readPrimaryToken;
+  }
+
+  // Writes carry an Idempotency-Key so a retried request (which reuses this
+  // config) is answered from the server's stored response instead of re-running
+  const method = (config.method || 'get').toUpperCase();
+  if (['POST', 'PUT', 'PATCH', 'DELETE'].includes(method)) {
+    config.headers = config.headers || {};
+    if (!config.headers['Idempotency-Key']) {
+      config.headers['Idempotency-Key'] = newIdempotencyKey();
+    }
+  }
 
   // Only set Content-Type for JSON manually; let FormData handle its own
   if (
@@ -27,7 +59,11 @@ api.interceptors.request.use((config) => {
 
 // Add a response interceptor to handle errors
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const pin = response.headers[READ_PRIMARY_HEADER.toLowerCase()];
+    if (pin) readPrimaryToken = pin;
+    return response;
+  },
   (error: AxiosError) => {
     if (error.response?.status === 401) {
       localStorage.removeItem('token');
@@ -46,7 +46,32 @@ export interface Application {
   notes?: string;
 }
 
+export interface ApplicationList {
+  total: number;
+  limit: number | null;
+  offset: number;
+  results: Application[];
+  facets: {
+    status: Record<string, number>;
+    company: Record<string, number>;
+  };
+}
+
 export interface ApiError {
   detail: string;
   status: number;
-} 
\ No newline at end of file
+}
+
+export interface DashboardSummary {
+  applications: {
+    total: number;
+    by_status: Record<string, number>;
+    archived: number;
+  };
+  resumes: number;
+  cover_letters: number;
+  recent_applications: Pick<Application, 'id' | 'company_name' | 'position' | 'status' | 'application_deadline' | 'created_at'>[];
+  recent_resumes: Pick<Resume, 'id' | 'file_name' | 'created_at'>[];
+  recent_cover_letters: Pick<CoverLetter, 'id' | 'resume_id' | 'tone' | 'created_at'>[];
+  upcoming_deadlines: Pick<Application, 'id' | 'company_name' | 'position' | 'status' | 'application_deadline'>[];
+}
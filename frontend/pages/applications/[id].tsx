@@ -65,9 +65,8 @@ export default function ApplicationDetailPage() {
         : newNote.trim();
       form.append('notes', updatedNotes);
 
-      await api.patch(`/applications/${id}`, form);
-      const response = await api.get(`/applications/${id}`);
-      setApplication(response.data);
+      const response = await api.patch(`/applications/${id}`, form);
+      setApplication(prev => prev ? { ...prev, ...response.data } : null);
       setNewNote('');
     } catch (err) {
       setError(handleApiError(err).detail);
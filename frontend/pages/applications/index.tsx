@@ -1,13 +1,26 @@
 import api, { handleApiError } from '@/lib/api';
 import { useAuth } from '@/lib/auth';
-import { Application } from '@/lib/types';
+import { Application, ApplicationList } from '@/lib/types';
 import { TrashIcon } from '@heroicons/react/24/outline';
 import { useRouter } from 'next/router';
 import { useEffect, useState } from 'react';
 
+const STATUSES: Application['status'][] = ['applied', 'interview', 'offer', 'rejected', 'accepted'];
+const SORTS = [
+  { value: '-created_at', label: 'Newest first' },
+  { value: 'created_at', label: 'Oldest first' },
+  { value: 'application_deadline', label: 'Deadline' },
+  { value: 'company_name', label: 'Company' },
+  { value: 'status', label: 'Status' },
+];
+
 export default function ApplicationsPage() {
   const { user } = useAuth();
   const [applications, setApplications] = useState<Application[]>([]);
+  const [facets, setFacets] = useState<ApplicationList['facets']>({ status: {}, company: {} });
+  const [statusFilter, setStatusFilter] = useState<string[]>([]);
+  const [companyFilter, setCompanyFilter] = useState('');
+  const [sort, setSort] = useState('-created_at');
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [showForm, setShowForm] = useState(false);
@@ -25,14 +38,22 @@ export default function ApplicationsPage() {
   const router = useRouter();
 
   useEffect(() => {
-    fetchApplications();
     fetchResumes();
   }, []);
 
+  useEffect(() => {
+    fetchApplications();
+  }, [statusFilter, companyFilter, sort]);
+
+  // Filtering, sorting and the chip counts all come from the server
   const fetchApplications = async () => {
     try {
-      const response = await api.get('/applications/');
-      setApplications(response.data);
+      const params = new URLSearchParams({ sort, facets: 'true' });
+      statusFilter.forEach((s) => params.append('status', s));
+      if (companyFilter) params.append('company', companyFilter);
+      const response = await api.get<ApplicationList>(`/applications/?${params}`);
+      setApplications(response.data.results);
+      setFacets(response.data.facets);
     } catch (err) {
       setError(handleApiError(err).detail);
     } finally {
@@ -40,6 +61,14 @@ export default function ApplicationsPage() {
     }
   };
 
+  const toggleStatus = (value: string) => {
+    setStatusFilter(
+      statusFilter.includes(value)
+        ? statusFilter.filter((s) => s !== value)
+        : [...statusFilter, value]
+    );
+  };
+
   const fetchResumes = async () => {
     try {
       const response = await api.get('/resumes/');
@@ -61,8 +90,8 @@ export default function ApplicationsPage() {
       if (formData.cover_letter_id) form.append('cover_letter_id', formData.cover_letter_id);
       if (formData.job_url) form.append('job_url', formData.job_url);
 
-      const response = await api.post('/applications/', form);
-      setApplications([...applications, response.data]);
+      await api.post('/applications/', form);
+      await fetchApplications();
       setShowForm(false);
       setFormData({
         company_name: '',
@@ -85,11 +114,7 @@ export default function ApplicationsPage() {
       form.append('status', newStatus);
 
       await api.patch(`/applications/${id}`, form);
-      setApplications(
-        applications.map((app) =>
-          app.id === id ? { ...app, status: newStatus } : app
-        )
-      );
+      await fetchApplications();
     } catch (err) {
       setError(handleApiError(err).detail);
     }
@@ -100,19 +125,25 @@ export default function ApplicationsPage() {
 
     try {
       await api.delete(`/applications/${id}`);
-      setApplications(applications.filter((app) => app.id !== id));
+      await fetchApplications();
     } catch (err) {
       setError(handleApiError(err).detail);
     }
   };
 
   const handleAddNote = async (id: string, note: string) => {
+    if (!note.trim()) return;
+
     try {
-      await api.post(`/applications/${id}/notes`, { note });
-      const response = await api.get(`/applications/${id}`);
+      // List rows don't carry notes and PATCH replaces them, so append to the current ones
+      const current = await api.get(`/applications/${id}`);
+      const form = new FormData();
+      form.append('notes', current.data.notes ? `${current.data.notes}\n${note.trim()}` : note.trim());
+
+      const response = await api.patch(`/applications/${id}`, form);
       setApplications(
         applications.map((app) =>
-          app.id === id ? response.data : app
+          app.id === id ? { ...app, ...response.data } : app
         )
       );
     } catch (err) {
@@ -245,6 +276,45 @@ export default function ApplicationsPage() {
         </div>
       )}
 
+      <div className="flex flex-wrap items-center gap-2">
+        {STATUSES.map((value) => (
+          <button
+            key={value}
+            onClick={() => toggleStatus(value)}
+            className={`px-3 py-1 rounded-full text-sm border ${
+              statusFilter.includes(value)
+                ? 'bg-indigo-600 text-white border-indigo-600'
+                : 'bg-white text-gray-700 border-gray-300 hover:bg-gray-50'
+            }`}
+          >
+            {value.charAt(0).toUpperCase() + value.slice(1)} ({facets.status[value] ?? 0})
+          </button>
+        ))}
+        <select
+          value={companyFilter}
+          onChange={(e) => setCompanyFilter(e.target.value)}
+          className="ml-auto rounded-md border-gray-300 shadow-sm text-sm focus:border-indigo-500 focus:ring-indigo-500"
+        >
+          <option value="">All companies</option>
+          {Object.entries(facets.company).map(([name, count]) => (
+            <option key={name} value={name}>
+              {name} ({count})
+            </option>
+          ))}
+        </select>
+        <select
+          value={sort}
+          onChange={(e) => setSort(e.target.value)}
+          className="rounded-md border-gray-300 shadow-sm text-sm focus:border-indigo-500 focus:ring-indigo-500"
+        >
+          {SORTS.map((option) => (
+            <option key={option.value} value={option.value}>
+              {option.label}
+            </option>
+          ))}
+        </select>
+      </div>
+
       <div className="bg-white shadow overflow-hidden sm:rounded-md">
         <ul className="divide-y divide-gray-200">
           {applications.map((application) => (
@@ -1,15 +1,13 @@
 import api, { handleApiError } from '@/lib/api';
 import { useAuth } from '@/lib/auth';
-import { Application, CoverLetter, Resume } from '@/lib/types';
+import { DashboardSummary } from '@/lib/types';
 import Link from 'next/link';
 import { useRouter } from 'next/router';
 import { useEffect, useState } from 'react';
 
 export default function Dashboard() {
   const { user } = useAuth();
-  const [resumes, setResumes] = useState<Resume[]>([]);
-  const [coverLetters, setCoverLetters] = useState<CoverLetter[]>([]);
-  const [applications, setApplications] = useState<Application[]>([]);
+  const [summary, setSummary] = useState<DashboardSummary | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const router = useRouter();
@@ -17,15 +15,9 @@ export default function Dashboard() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [resumesRes, coverLettersRes, applicationsRes] = await Promise.all([
-          api.get('/resumes/'),
-          api.get('/cover-letters/'),
-          api.get('/applications/'),
-        ]);
-
-        setResumes(resumesRes.data);
-        setCoverLetters(coverLettersRes.data);
-        setApplications(applicationsRes.data);
+        // One small aggregate response instead of every resume, letter and application
+        const response = await api.get('/dashboard/summary');
+        setSummary(response.data);
       } catch (err) {
         setError(handleApiError(err).detail);
       } finally {
@@ -59,21 +51,21 @@ export default function Dashboard() {
         <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
           <div className="bg-indigo-50 rounded-lg p-4">
             <h3 className="text-lg font-medium text-indigo-900">Resumes</h3>
-            <p className="text-3xl font-bold text-indigo-600">{resumes.length}</p>
+            <p className="text-3xl font-bold text-indigo-600">{summary?.resumes ?? 0}</p>
             <Link href="/resumes" className="text-indigo-600 hover:text-indigo-900">
               View all →
             </Link>
           </div>
           <div className="bg-green-50 rounded-lg p-4">
             <h3 className="text-lg font-medium text-green-900">Cover Letters</h3>
-            <p className="text-3xl font-bold text-green-600">{coverLetters.length}</p>
+            <p className="text-3xl font-bold text-green-600">{summary?.cover_letters ?? 0}</p>
             <Link href="/cover-letters" className="text-green-600 hover:text-green-900">
               View all →
             </Link>
           </div>
           <div className="bg-blue-50 rounded-lg p-4">
             <h3 className="text-lg font-medium text-blue-900">Applications</h3>
-            <p className="text-3xl font-bold text-blue-600">{applications.length}</p>
+            <p className="text-3xl font-bold text-blue-600">{summary?.applications.total ?? 0}</p>
             <Link href="/applications" className="text-blue-600 hover:text-blue-900">
               View all →
             </Link>
@@ -102,7 +94,7 @@ export default function Dashboard() {
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
-              {applications.slice(0, 5).map((application) => (
+              {(summary?.recent_applications ?? []).map((application) => (
                 <tr 
                   key={application.id}
                   onClick={() => router.push(`/applications/${application.id}`)}